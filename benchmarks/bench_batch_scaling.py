@@ -0,0 +1,57 @@
+"""批量计算扩展性基准：报告1..N个工作进程时的吞吐量（行/秒）
+
+用法: python benchmarks/bench_batch_scaling.py [--lines N] [--max-jobs N] [--chunk-size N]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bitwise_engine import Engine, iter_lines, run_batch, run_parallel_batch
+
+
+def write_input(path, lines, seed=0):
+    """生成模拟寄存器日志的表达式文件，约一半为重复的表达式"""
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(lines):
+            if i % 2:
+                f.write(f"({rng.getrandbits(32)} >> {rng.randrange(16)}) & 1023\n")
+            else:
+                f.write(f"({i % 1000} << 4) | {rng.randrange(16)}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=200000)
+    parser.add_argument("--max-jobs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "input.txt")
+        write_input(path, args.lines)
+
+        print(f"{'进程数':>6} {'耗时(s)':>10} {'吞吐量(行/s)':>14} {'加速比':>8}")
+        baseline = None
+        for jobs in range(1, args.max_jobs + 1):
+            engine = Engine()
+            with open(os.devnull, 'w') as out:
+                start = time.perf_counter()
+                if jobs == 1:
+                    run_batch(iter_lines([path]), out, engine, [16])
+                else:
+                    run_parallel_batch(iter_lines([path]), out, engine, [16],
+                                       jobs=jobs, chunk_size=args.chunk_size)
+                elapsed = time.perf_counter() - start
+            throughput = args.lines / elapsed
+            baseline = baseline or throughput
+            print(f"{jobs:>6} {elapsed:>10.2f} {throughput:>14.0f} {throughput / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""位画布重绘开销基准：对比每次按键全量重建与增量更新
+
+用法: python benchmarks/bench_bit_display.py [--rounds N]
+需要可用的图形显示（本地桌面或 Xvfb）。
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tkinter as tk
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bitwise_calculator import BitGridRenderer
+
+BIT_SIZES = [64, 256, 1024]
+
+
+def keystroke_values(bit_size, rounds, seed=0):
+    """模拟在十六进制输入框中逐个键入数字产生的值序列"""
+    rng = random.Random(seed)
+    mask = (1 << bit_size) - 1
+    value = 0
+    values = []
+    for _ in range(rounds):
+        value = ((value << 4) | rng.randrange(16)) & mask
+        values.append(value)
+    return values
+
+
+def toggle_values(bit_size, rounds, seed=0):
+    """模拟双击切换单个位产生的值序列"""
+    rng = random.Random(seed)
+    value = rng.getrandbits(bit_size)
+    values = []
+    for _ in range(rounds):
+        value ^= 1 << rng.randrange(bit_size)
+        values.append(value)
+    return values
+
+
+def measure(canvas, bit_size, values, incremental):
+    """返回每次重绘的平均耗时（毫秒），包含Tk的空闲重绘"""
+    renderer = BitGridRenderer(canvas)
+    renderer.build(0, bit_size, ())
+    canvas.update_idletasks()
+    draw = renderer.render if incremental else renderer.build
+
+    start = time.perf_counter()
+    for value in values:
+        draw(value, bit_size, ())
+        canvas.update_idletasks()
+    return (time.perf_counter() - start) * 1000 / len(values)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    root = tk.Tk()
+    root.withdraw()
+    canvas = tk.Canvas(root)
+    canvas.pack()
+
+    print(f"{'位宽':>6} {'场景':>6} {'全量重建(ms)':>14} {'增量更新(ms)':>14} {'加速比':>8}")
+    for bit_size in BIT_SIZES:
+        for name, make in (("键入", keystroke_values), ("切换位", toggle_values)):
+            values = make(bit_size, args.rounds)
+            full = measure(canvas, bit_size, values, incremental=False)
+            incremental = measure(canvas, bit_size, values, incremental=True)
+            print(f"{bit_size:>6} {name:>6} {full:>14.3f} {incremental:>14.3f} {full / incremental:>7.1f}x")
+
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""端序转换基准：对比逐字节串拼接的旧实现与端序引擎在1024~65536位时的耗时
+
+用法: python benchmarks/bench_endian.py [--rounds N]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bitwise_engine import byteswap, byteswap_many
+
+BIT_SIZES = [1024, 4096, 16384, 65536]
+
+
+def legacy_dword_swap(value, bit_size):
+    """旧版on_endian_change对宽数值的实现：按32位单元逐个拼接bytes"""
+    bytes_needed = (bit_size + 31) // 32 * 4
+    value_bytes = value.to_bytes(bytes_needed, byteorder='big')
+    result_bytes = b''
+    for i in range(0, bytes_needed, 4):
+        result_bytes += value_bytes[i:i+4][::-1]
+    return int.from_bytes(result_bytes, byteorder='big')
+
+
+def per_call_us(func, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    return (time.perf_counter() - start) * 1e6 / rounds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    print(f"{'位宽':>6} {'旧实现(us)':>12} {'32位字(us)':>12} {'64位字(us)':>12} {'整体(us)':>10} {'批量/值(us)':>12}")
+    for bit_size in BIT_SIZES:
+        value = rng.getrandbits(bit_size)
+        values = [rng.getrandbits(bit_size) for _ in range(100)]
+        legacy = per_call_us(lambda: legacy_dword_swap(value, bit_size), args.rounds)
+        dword = per_call_us(lambda: byteswap(value, bit_size, 32), args.rounds)
+        qword = per_call_us(lambda: byteswap(value, bit_size, 64), args.rounds)
+        whole = per_call_us(lambda: byteswap(value, bit_size), args.rounds)
+        bulk = per_call_us(lambda: byteswap_many(values, bit_size, 32), max(args.rounds // 10, 1)) / len(values)
+        print(f"{bit_size:>6} {legacy:>12.1f} {dword:>12.1f} {qword:>12.1f} {whole:>10.1f} {bulk:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""表达式求值微基准：对比冷缓存（每次重新词法/语法分析）与热缓存的求值耗时
+
+用法: python benchmarks/bench_expression.py [--rounds N]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bitwise_expr import ExpressionCache
+
+EXPRESSIONS = {
+    "短表达式": "1<<12|255",
+    "中等表达式": "(123456789 & 4294967295) << 3 | (987654321 >> 5) + 42 * 7",
+    "长表达式": " + ".join(f"({i} << {i % 31}) & {i * 7919}" for i in range(200)),
+}
+
+
+def per_call_us(func, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    return (time.perf_counter() - start) * 1e6 / rounds
+
+
+def bench_typing(expression, rounds):
+    """模拟逐字符键入表达式：每次按键都对当前前缀求值"""
+    cache = ExpressionCache()
+    prefixes = [expression[:i] for i in range(1, len(expression) + 1)]
+
+    def run():
+        cache.clear()
+        for prefix in prefixes:
+            cache.evaluate(prefix)
+    return per_call_us(run, rounds) / len(prefixes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'表达式':<10} {'冷缓存(us)':>12} {'热缓存(us)':>12} {'加速比':>8}")
+    for name, expression in EXPRESSIONS.items():
+        cache = ExpressionCache()
+
+        def cold():
+            cache.clear()
+            cache.evaluate(expression)
+
+        rounds = max(args.rounds * len("1<<12|255") // len(expression), 10)
+        cold_us = per_call_us(cold, rounds)
+        cache.clear()
+        warm_us = per_call_us(lambda: cache.evaluate(expression), rounds)
+        print(f"{name:<10} {cold_us:>12.2f} {warm_us:>12.2f} {cold_us / warm_us:>7.1f}x")
+
+    cache = ExpressionCache()
+    expression = EXPRESSIONS["中等表达式"]
+    for _ in range(args.rounds):
+        cache.evaluate(expression)
+    print(f"\n命中统计: {cache.stats()}")
+    print(f"逐字符键入中等表达式，每次按键平均: {bench_typing(expression, 20):.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""历史记录过滤基准：在大量历史记录中按输入前缀筛选下拉框候选，对比逐条扫描与前缀索引
+
+用法: python benchmarks/bench_history.py [--count N]
+"""
+import argparse
+import heapq
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bitwise_history import HistoryStore
+
+QUERIES = ["", "0", "0x", "0x1", "0x1f", "0x1f2", "1<<", "zzz"]
+
+
+def per_call_us(func, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    return (time.perf_counter() - start) * 1e6 / rounds
+
+
+def make_entries(count, rng):
+    entries = []
+    for _ in range(count):
+        value = rng.getrandbits(rng.choice([16, 32, 64]))
+        if rng.random() < 0.7:
+            entries.append(f"0x{value:X} {rng.choice('&|^+')} {rng.randint(0, 1 << 20)}")
+        else:
+            entries.append(f"1<<{rng.randint(0, 63)} | {value}")
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=100000, help="历史记录条数（默认100000）")
+    parser.add_argument("--limit", type=int, default=50, help="下拉框显示的条数（默认50）")
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    entries = make_entries(args.count, rng)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "history.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            # 部分记录重复使用，模拟使用频率差异
+            for value in entries + rng.choices(entries[:1000], k=args.count // 10):
+                f.write(value + '\n')
+        store = HistoryStore(path, max_num=args.count)
+        start = time.perf_counter()
+        store.load()
+        print(f"加载 {len(store)} 条记录: {(time.perf_counter() - start) * 1000:.1f} ms\n")
+
+        def scan(query):
+            """逐条扫描全部记录再按分数排序"""
+            prefix = query.lower()
+            matches = [value for value in store.entries if value.lower().startswith(prefix)]
+            return heapq.nlargest(args.limit, matches, key=store.entries.__getitem__)
+
+        print(f"{'前缀':<8} {'匹配数':>8} {'逐条扫描(us)':>14} {'索引(us)':>10} {'加速比':>8}")
+        for query in QUERIES:
+            matches = sum(1 for value in store.entries if value.lower().startswith(query.lower()))
+            assert scan(query) == store.search(query, args.limit)
+            scan_us = per_call_us(lambda: scan(query), max(args.rounds // 20, 3))
+            index_us = per_call_us(lambda: store.search(query, args.limit), args.rounds)
+            print(f"{query!r:<8} {matches:>8} {scan_us:>14.1f} {index_us:>10.1f} {scan_us / index_us:>7.1f}x")
+
+        added = rng.choices(entries, k=1000)
+        add_us = per_call_us(lambda: store.add(added.pop()), len(added))
+        print(f"\n添加记录（含索引和排序缓存更新），每条平均: {add_us:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
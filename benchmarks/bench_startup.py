@@ -0,0 +1,108 @@
+"""启动时间基准：检查计算器从启动到首帧后延迟加载完成是否在目标时间（默认200 ms）内
+
+用法: python benchmarks/bench_startup.py [--rounds N] [--history N] [--target MS]
+
+无图形显示时只测量不依赖Tk的阶段：新进程中解释器启动加导入模块的耗时，以及加载历史记录的耗时，
+两者之和为启动时间的下限；有图形显示时另外运行 bitwise_calculator.py --profile-startup 测量完整启动。
+任一测得的时间超过目标时返回非零退出码。
+"""
+import argparse
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+TOP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, TOP_DIR)
+
+from bitwise_history import HistoryStore
+
+# 在新进程中导入计算器模块，输出导入耗时（秒）
+IMPORT_SCRIPT = ("import time; t = time.perf_counter(); import bitwise_calculator; "
+                 "print(time.perf_counter() - t)")
+
+
+def measure_import(rounds):
+    """返回(进程总耗时中位数, 导入耗时中位数)，单位ms；每轮使用新进程，不受已导入模块影响"""
+    totals, imports = [], []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        output = subprocess.run([sys.executable, "-c", IMPORT_SCRIPT], cwd=TOP_DIR, check=True,
+                                capture_output=True, text=True).stdout
+        totals.append((time.perf_counter() - start) * 1000)
+        imports.append(float(output) * 1000)
+    return statistics.median(totals), statistics.median(imports)
+
+
+def measure_history_load(count, rounds):
+    """返回加载count条历史记录的耗时中位数（ms）"""
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "history.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            for _ in range(count):
+                f.write(f"0x{rng.getrandbits(32):X} {rng.choice('&|^+')} {rng.randint(0, 1 << 20)}\n")
+        times = []
+        for _ in range(rounds):
+            store = HistoryStore(path, max_num=100000)
+            start = time.perf_counter()
+            store.load()
+            times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def has_display():
+    try:
+        import tkinter as tk
+        tk.Tk().destroy()
+        return True
+    except Exception:
+        return False
+
+
+def measure_full_startup(rounds):
+    """运行 --profile-startup，返回到延迟加载完成的累计耗时中位数（ms）"""
+    times = []
+    for _ in range(rounds):
+        output = subprocess.run([sys.executable, os.path.join(TOP_DIR, "bitwise_calculator.py"),
+                                 "--profile-startup"], cwd=TOP_DIR, check=True,
+                                capture_output=True, text=True).stdout
+        # 报告的最后一行为最后一个阶段，最后一列为累计耗时
+        times.append(float(output.strip().splitlines()[-1].split()[-1]))
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--history", type=int, default=10000, help="历史记录条数（默认10000）")
+    parser.add_argument("--target", type=float, default=200, help="目标启动时间，毫秒（默认200）")
+    args = parser.parse_args()
+
+    process_ms, import_ms = measure_import(args.rounds)
+    history_ms = measure_history_load(args.history, args.rounds)
+    headless_ms = process_ms + history_ms
+    print(f"解释器启动+导入模块: {process_ms:.1f} ms（其中导入 {import_ms:.1f} ms）")
+    print(f"加载 {args.history} 条历史记录: {history_ms:.1f} ms")
+    print(f"无界面阶段合计: {headless_ms:.1f} ms（目标 {args.target:.0f} ms）")
+    measured = [headless_ms]
+
+    if has_display():
+        full_ms = measure_full_startup(args.rounds)
+        print(f"完整启动（至延迟加载完成）: {full_ms:.1f} ms（目标 {args.target:.0f} ms）")
+        measured.append(full_ms)
+    else:
+        print("无图形显示，跳过完整启动测量（可使用 xvfb-run）")
+
+    if max(measured) > args.target:
+        print("超过目标启动时间")
+        return 1
+    print("在目标启动时间内")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
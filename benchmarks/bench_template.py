@@ -0,0 +1,60 @@
+"""表达式模板基准：对大量数值套用同一个字段提取公式，对比逐个代入求值与编译后的模板
+
+用法: python benchmarks/bench_template.py [--count N]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bitwise_expr import ExpressionCache, compile_template
+
+TEMPLATE = "(x >> 12) & 0x3FF"
+SUBSTITUTED = "({} >> 12) & 0x3FF"
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=200000, help="数值个数（默认200000）")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    values = [rng.getrandbits(32) for _ in range(args.count)]
+
+    # 逐个代入：每个数值生成一个新的常量表达式，都要经过词法和语法分析
+    cache = ExpressionCache()
+    substituted, substituted_time = timed(
+        lambda: [cache.evaluate(SUBSTITUTED.format(v)) for v in values])
+
+    template, compile_time = timed(lambda: compile_template(TEMPLATE))
+    results, template_time = timed(lambda: template.apply(values))
+    assert results == substituted
+
+    print(f"模板: {TEMPLATE}    生成的代码: {template.source}")
+    print(f"{'方式':<16} {'总耗时(ms)':>12} {'每个数值(ns)':>14}")
+    print(f"{'逐个代入求值':<16} {substituted_time * 1e3:>12.1f} {substituted_time * 1e9 / args.count:>14.0f}")
+    print(f"{'编译模板':<16} {compile_time * 1e3:>12.3f}")
+    print(f"{'模板逐个调用':<16} {template_time * 1e3:>12.1f} {template_time * 1e9 / args.count:>14.0f}")
+
+    try:
+        import numpy as np
+    except ImportError:
+        print("未安装NumPy，跳过数组测试")
+        return
+    words = np.array(values, dtype=np.uint32)
+    array_results, array_time = timed(lambda: template.apply(words))
+    assert array_results.tolist() == results
+    print(f"{'模板NumPy数组':<16} {array_time * 1e3:>12.1f} {array_time * 1e9 / args.count:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""计算服务压力测试客户端：多个并发连接，每个连接以流水线方式发送请求，统计吞吐量和延迟
+
+用法:
+    python bitwise_server.py --unix /tmp/bitwise.sock &
+    python benchmarks/load_server.py --unix /tmp/bitwise.sock --clients 50 --requests 2000 --pipeline 32
+
+也可以使用 --spawn 在子进程中自动启动服务，测试结束后关闭。
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_requests(count, seed):
+    """生成JSON请求：字面量转换与不同长度的表达式混合，部分表达式重复以命中缓存"""
+    rng = random.Random(seed)
+    requests = []
+    for i in range(count):
+        kind = rng.random()
+        if kind < 0.3:
+            expr = hex(rng.getrandbits(64))
+        elif kind < 0.8:
+            expr = f"({rng.getrandbits(32)} >> {rng.randint(0, 31)}) & 0x3FF"
+        else:
+            expr = " + ".join(f"({rng.getrandbits(16)} << {j})" for j in range(20))
+        requests.append(json.dumps({"id": i, "expr": expr, "bits": 64, "bases": ["hex", "dec"]}) + '\n')
+    return [request.encode() for request in requests]
+
+
+async def run_client(connect, requests, depth, latencies):
+    """在一个连接上保持最多depth个未完成的请求"""
+    reader, writer = await connect()
+    sent_at = {}
+    window = asyncio.Semaphore(depth)
+    errors = 0
+
+    async def send():
+        for i, request in enumerate(requests):
+            await window.acquire()
+            sent_at[i] = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+
+    sender = asyncio.create_task(send())
+    for i in range(len(requests)):
+        line = await reader.readline()
+        if not line:
+            raise ConnectionError("服务关闭了连接")
+        latencies.append(time.perf_counter() - sent_at.pop(i))
+        if not json.loads(line)["ok"]:
+            errors += 1
+        window.release()
+    await sender
+    writer.close()
+    await writer.wait_closed()
+    return errors
+
+
+async def run(args):
+    if args.unix:
+        def connect():
+            return asyncio.open_unix_connection(args.unix, limit=16 * 1024 * 1024)
+    else:
+        def connect():
+            return asyncio.open_connection(args.host, args.port, limit=16 * 1024 * 1024)
+
+    requests = [make_requests(args.requests, seed) for seed in range(args.clients)]
+    latencies = []
+    start = time.perf_counter()
+    errors = await asyncio.gather(*(run_client(connect, r, args.pipeline, latencies) for r in requests))
+    elapsed = time.perf_counter() - start
+
+    total = args.clients * args.requests
+    latencies.sort()
+    print(f"连接数 {args.clients}，每连接请求数 {args.requests}，流水线深度 {args.pipeline}")
+    print(f"总请求数 {total}，耗时 {elapsed:.2f} s，吞吐量 {total / elapsed:.0f} 请求/秒，错误 {sum(errors)}")
+    print(f"延迟(ms): p50 {statistics.median(latencies) * 1e3:.2f}  "
+          f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1e3:.2f}  max {latencies[-1] * 1e3:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--unix", metavar="PATH", help="服务的Unix套接字路径")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--clients", type=int, default=20, help="并发连接数（默认20）")
+    parser.add_argument("--requests", type=int, default=1000, help="每个连接的请求数（默认1000）")
+    parser.add_argument("--pipeline", type=int, default=16, help="每个连接未完成请求的上限（默认16）")
+    parser.add_argument("--spawn", action="store_true", help="在子进程中启动服务（使用临时Unix套接字）")
+    args = parser.parse_args()
+
+    server = None
+    if args.spawn:
+        args.unix = os.path.join(tempfile.mkdtemp(), "bitwise.sock")
+        server = subprocess.Popen([sys.executable, os.path.join(ROOT, "bitwise_server.py"), "--unix", args.unix])
+        while not os.path.exists(args.unix):
+            if server.poll() is not None:
+                sys.exit("服务启动失败")
+            time.sleep(0.05)
+    try:
+        asyncio.run(run(args))
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
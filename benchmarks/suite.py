@@ -0,0 +1,254 @@
+"""计算器核心基准测试套件：无界面地驱动真实代码路径，保存基线并检测显著的性能回退
+
+用法:
+    python benchmarks/suite.py                      # 运行并与基线比较（如果基线存在）
+    python benchmarks/suite.py --save-baseline      # 运行并保存为新的基线
+    python benchmarks/suite.py -k bit_display       # 只运行名称包含指定字符串的用例
+
+界面相关的用例在隐藏的Tk根窗口上运行，需要图形显示；无桌面环境时可使用 xvfb-run。
+两次结果的比较使用Mann-Whitney U检验：p值低于 --alpha 且中位数变化超过 --min-change 时判定为回退或提升。
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tkinter as tk
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bitwise_calculator import BIT_SIZES, BinaryCalculator
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+SHORT_EXPRESSION = "1<<12|255"
+LONG_EXPRESSION = " + ".join(f"({i} << {i % 31}) & {i * 7919}" for i in range(100))
+
+
+def make_app():
+    """在隐藏的根窗口上创建计算器；窗口不会被映射，因此不会加载历史记录"""
+    root = tk.Tk()
+    root.withdraw()
+    app = BinaryCalculator(root)
+    return root, app
+
+
+def set_value(app, value, bit_size):
+    app.bit_size_var.set(bit_size)
+    app.base_var.set(16)
+    app.current_value.set(app.format_number(value, 16))
+
+
+def build_cases(app):
+    """返回 {用例名: 无参数的可调用对象}"""
+    rng = random.Random(0)
+    cases = {}
+
+    # 表达式解析：冷缓存为完整的词法和语法分析，热缓存为缓存命中
+    def parse_cold(expression):
+        def run():
+            app.expression_cache.clear()
+            app.parse_expression(expression)
+        return run
+    cases["parse_expression/short_cold"] = parse_cold(SHORT_EXPRESSION)
+    cases["parse_expression/long_cold"] = parse_cold(LONG_EXPRESSION)
+    cases["parse_expression/short_warm"] = lambda: app.parse_expression(SHORT_EXPRESSION)
+    cases["parse_expression/long_warm"] = lambda: app.parse_expression(LONG_EXPRESSION)
+
+    # 各进制格式化
+    for bit_size in (64, 1024):
+        value = rng.getrandbits(bit_size)
+        for base in (2, 8, 10, 16):
+            cases[f"format_number/{bit_size}bit_base{base}"] = \
+                lambda value=value, base=base: app.format_number(value, base)
+
+    # 端序转换（包含结果写回和显示刷新）
+    for bit_size in (16, 32, 64, 128, 256, 512, 1024):
+        value = rng.getrandbits(bit_size)
+
+        def endian(bit_size=bit_size, value=value):
+            set_value(app, value, bit_size)
+            app.little_endian_var.set(not app.little_endian_var.get())
+            app.on_endian_change()
+        cases[f"on_endian_change/{bit_size}bit"] = endian
+
+    # 位选择：每次调用在两个选择之间切换，模拟拖动时选择不断变化
+    value = rng.getrandbits(1024)
+    selections = {
+        "dense": [set(range(0, 512)), set(range(0, 513))],
+        "sparse": [set(range(0, 1024, 3)), set(range(1, 1024, 3))],
+    }
+    for name, (first, second) in selections.items():
+        state = {"flip": False}
+
+        def selection(first=first, second=second, state=state):
+            state["flip"] = not state["flip"]
+            app.selected_bits = first if state["flip"] else second
+            app.update_selection_display(value)
+        cases[f"update_selection_display/1024bit_{name}"] = selection
+
+    # 位画布：增量更新（值变化）与按位宽重建
+    for bit_size in (8, 16, 32, 64, 128, 256, 512, 1024):
+        values = [rng.getrandbits(bit_size) for _ in range(2)]
+        state = {"flip": False}
+
+        def bit_display(bit_size=bit_size, values=values, state=state):
+            state["flip"] = not state["flip"]
+            app.bit_size_var.set(bit_size)
+            app.selected_bits = set()
+            app.update_bit_display(values[state["flip"]])
+            app.bit_canvas.update_idletasks()
+
+        def bit_display_build(bit_size=bit_size, values=values):
+            app.bit_size_var.set(bit_size)
+            app.selected_bits = set()
+            app.bit_renderer.reset()
+            app.update_bit_display(values[0])
+            app.bit_canvas.update_idletasks()
+        cases[f"update_bit_display/{bit_size}bit"] = bit_display
+        cases[f"update_bit_display/{bit_size}bit_build"] = bit_display_build
+
+    # 位图显示：切换单个位只重写一行像素
+    bitmap_size = BIT_SIZES[-1]
+    bitmap_value = rng.getrandbits(bitmap_size)
+    bitmap_state = {"bit": 0}
+
+    def bitmap_toggle():
+        bitmap_state["bit"] = (bitmap_state["bit"] + 7919) % bitmap_size
+        app.bit_size_var.set(bitmap_size)
+        app.selected_bits = set()
+        app.update_bit_display(bitmap_value ^ (1 << bitmap_state["bit"]))
+        app.bit_canvas.update_idletasks()
+
+    def bitmap_build():
+        app.bit_size_var.set(bitmap_size)
+        app.selected_bits = set()
+        app.bit_renderer.reset()
+        app.update_bit_display(bitmap_value)
+        app.bit_canvas.update_idletasks()
+    cases[f"update_bit_display/{bitmap_size}bit_bitmap"] = bitmap_toggle
+    cases[f"update_bit_display/{bitmap_size}bit_bitmap_build"] = bitmap_build
+
+    return cases
+
+
+def measure(func, repeats, min_time):
+    """返回repeats个样本，每个样本为一次调用的平均耗时（秒）；每个样本至少运行min_time秒"""
+    func()
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        number *= 2
+
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+    return samples
+
+
+def mann_whitney_p(a, b):
+    """Mann-Whitney U检验的双侧p值（正态近似，处理并列秩）"""
+    n1, n2 = len(a), len(b)
+    combined = sorted([(x, 0) for x in a] + [(x, 1) for x in b])
+    ranks = [0.0] * len(combined)
+    tie_term = 0.0
+    i = 0
+    while i < len(combined):
+        j = i
+        while j + 1 < len(combined) and combined[j + 1][0] == combined[i][0]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[k] = (i + j) / 2 + 1
+        tie_term += (j - i + 1) ** 3 - (j - i + 1)
+        i = j + 1
+
+    rank_sum = sum(rank for rank, (_, group) in zip(ranks, combined) if group == 0)
+    u = rank_sum - n1 * (n1 + 1) / 2
+    n = n1 + n2
+    variance = n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1)))
+    if variance <= 0:
+        return 1.0
+    z = (u - n1 * n2 / 2) / math.sqrt(variance)
+    return math.erfc(abs(z) / math.sqrt(2))
+
+
+def compare(results, baseline, alpha, min_change):
+    """与基线比较，返回回退的用例列表"""
+    regressions = []
+    print(f"\n{'用例':<45} {'基线(us)':>10} {'当前(us)':>10} {'变化':>8} {'p值':>8}  结论")
+    for name, result in results.items():
+        base = baseline.get("results", {}).get(name)
+        if base is None:
+            continue
+        old, new = statistics.median(base["samples"]), statistics.median(result["samples"])
+        change = new / old - 1
+        p = mann_whitney_p(base["samples"], result["samples"])
+        verdict = ""
+        if p < alpha and abs(change) > min_change:
+            verdict = "回退" if change > 0 else "提升"
+            if change > 0:
+                regressions.append(name)
+        print(f"{name:<45} {old * 1e6:>10.2f} {new * 1e6:>10.2f} {change:>+8.1%} {p:>8.4f}  {verdict}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-k", "--filter", default="", help="只运行名称包含该字符串的用例")
+    parser.add_argument("--repeats", type=int, default=15, help="每个用例的样本数（默认15）")
+    parser.add_argument("--min-time", type=float, default=0.02, help="每个样本的最短运行时间，秒（默认0.02）")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="基线文件路径")
+    parser.add_argument("--save-baseline", action="store_true", help="将本次结果保存为基线")
+    parser.add_argument("--alpha", type=float, default=0.01, help="显著性水平（默认0.01）")
+    parser.add_argument("--min-change", type=float, default=0.05, help="判定为变化的最小中位数变化比例（默认0.05）")
+    args = parser.parse_args()
+
+    try:
+        root, app = make_app()
+    except tk.TclError as e:
+        sys.exit(f"无法创建Tk窗口（需要图形显示，可使用 xvfb-run）: {e}")
+
+    results = {}
+    print(f"{'用例':<45} {'中位数(us)':>12} {'最小(us)':>10}")
+    for name, func in build_cases(app).items():
+        if args.filter not in name:
+            continue
+        samples = measure(func, args.repeats, args.min_time)
+        results[name] = {"samples": samples}
+        print(f"{name:<45} {statistics.median(samples) * 1e6:>12.2f} {min(samples) * 1e6:>10.2f}")
+    root.destroy()
+
+    regressions = []
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({
+                "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "results": results,
+            }, f, indent=2)
+        print(f"\n基线已保存到 {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.alpha, args.min_change)
+        if regressions:
+            print(f"\n发现 {len(regressions)} 个显著回退: {', '.join(regressions)}")
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,419 @@
 import os
+import sys
+import time
+
+# 启动计时起点，用于 --profile-startup 统计各阶段耗时
+STARTUP_T0 = time.perf_counter()
+
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
+
+from bitwise_convert import int_to_str, parse_int
+from bitwise_engine import (EXPRESSION_CHARS, byteswap, format_number, gather_bits, literal_base, selection_mask,
+                            selection_runs, truncate)
+from bitwise_expr import ExpressionCache
+from bitwise_file import MappedFile
+from bitwise_layout import load_layouts
+from bitwise_perf import Instrumentation
+from bitwise_workspace import Workspace, parse_assignment
+from bitwise_history import HistoryStore
+from bitwise_undo import UndoHistory
+
+# 支持的标准位宽，超过1024位时位画布切换为虚拟化绘制，更宽时切换为位图显示
+BIT_SIZES = [8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768, 65536]
+
+
+class BitGridRenderer:
+    """位画布渲染器：每种位宽只创建一次画布元素，之后只更新值或选择状态变化的位"""
+
+    # 固定每行显示32位，确保32位和64位的每行宽度一致
+    bits_per_row = 32
+    cell_width = 25
+    cell_height = 25
+    row_spacing = 20
+    start_x = 10
+    start_y = 10
+
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.bit_size = None
+        self.value = 0
+        self.selected_bits = frozenset()
+        # cells[bit_index] = (矩形id, 位值文本id)
+        self.cells = []
+        # 画布元素统计：当前数量以及累计创建、删除、修改的次数
+        self.item_count = 0
+        self.items_created = 0
+        self.items_deleted = 0
+        self.items_configured = 0
+
+    @staticmethod
+    def cell_color(bit, selected):
+        """确定颜色：选中位使用不同颜色"""
+        if selected:
+            return "lightblue" if bit else "lightyellow"
+        return "lightgreen" if bit else "lightcoral"
+
+    def row_count(self):
+        return (self.bit_size + self.bits_per_row - 1) // self.bits_per_row
+
+    def row_bits(self, row):
+        """返回指定行包含的位索引（从高到低）"""
+        high = self.bit_size - 1 - row * self.bits_per_row
+        low = max(high - self.bits_per_row + 1, 0)
+        return range(high, low - 1, -1)
+
+    def cell_origin(self, bit_index):
+        """计算位单元格左上角坐标（最高位在左上角）"""
+        row, col = divmod(self.bit_size - bit_index - 1, self.bits_per_row)
+        x = self.start_x + col * self.cell_width
+        y = self.start_y + row * (self.cell_height + self.row_spacing)
+        return x, y
+
+    def reset(self):
+        """画布被其他渲染器接管后调用，下次渲染时重建"""
+        self.bit_size = None
+        self.cells = []
+        self.items_deleted += self.item_count
+        self.item_count = 0
+
+    def start_build(self, value, bit_size, selected_bits):
+        """清空画布并记录新的位宽、值和选择状态"""
+        self.canvas.delete("all")
+        self.items_deleted += self.item_count
+        self.item_count = 0
+        self.bit_size = bit_size
+        self.value = value & ((1 << bit_size) - 1)
+        self.selected_bits = frozenset(selected_bits)
+
+        # 计算画布所需尺寸
+        canvas_width = self.bits_per_row * self.cell_width + 20
+        canvas_height = self.row_count() * (self.cell_height + self.row_spacing) + 20
+        self.canvas.config(scrollregion=(0, 0, canvas_width, canvas_height))
+
+    def draw_cell(self, bit_index, tags=()):
+        """绘制单个位的值框、位值和位索引，返回(矩形id, 位值文本id)"""
+        canvas = self.canvas
+        x, y = self.cell_origin(bit_index)
+        bit = (self.value >> bit_index) & 1
+        color = self.cell_color(bit, bit_index in self.selected_bits)
+        font_size = 8 if self.cell_width < 15 else 10
+
+        # 绘制位值框
+        rect_id = canvas.create_rectangle(x, y, x + self.cell_width, y + self.cell_height,
+                                          fill=color, outline="black", width=1, tags=tags)
+        # 绘制位值
+        text_id = canvas.create_text(x + self.cell_width/2, y + self.cell_height/2,
+                                     text=str(bit), font=("Arial", font_size, "bold"), tags=tags)
+        # 显示位索引
+        canvas.create_text(x + self.cell_width/2, y + self.cell_height + 8,
+                           text=str(bit_index), font=("Arial", 6), tags=tags)
+
+        self.item_count += 3
+        self.items_created += 3
+        return rect_id, text_id
+
+    def build(self, value, bit_size, selected_bits):
+        """按位宽重建全部画布元素"""
+        self.start_build(value, bit_size, selected_bits)
+        self.cells = [None] * bit_size
+        for bit_index in range(bit_size - 1, -1, -1):
+            self.cells[bit_index] = self.draw_cell(bit_index)
+
+    def refresh_viewport(self):
+        """视口滚动或尺寸变化时调用；完整绘制模式下所有行都已存在"""
+
+    def bit_at(self, x, y):
+        """按网格布局直接换算画布坐标(x, y)处的位索引，耗时与画布元素数量无关
+
+        落在行间距（位索引文字）上或网格之外时返回None。
+        """
+        if self.bit_size is None:
+            return None
+        col = int((x - self.start_x) // self.cell_width)
+        row, offset = divmod(y - self.start_y, self.cell_height + self.row_spacing)
+        row = int(row)
+        if offset > self.cell_height or not (0 <= col < self.bits_per_row and 0 <= row < self.row_count()):
+            return None
+        bit_index = self.bit_size - 1 - (row * self.bits_per_row + col)
+        return bit_index if bit_index >= 0 else None
+
+    def update_cell(self, bit_index, bit, selected, value_changed):
+        """更新已绘制单元格的颜色，位值变化时同时更新文本"""
+        rect_id, text_id = self.cells[bit_index]
+        self.canvas.itemconfigure(rect_id, fill=self.cell_color(bit, selected))
+        self.items_configured += 1
+        if value_changed:
+            self.canvas.itemconfigure(text_id, text=str(bit))
+            self.items_configured += 1
+
+    def render(self, value, bit_size, selected_bits):
+        """增量更新：只修改值或选择状态发生变化的位"""
+        if bit_size != self.bit_size:
+            self.build(value, bit_size, selected_bits)
+            return
+
+        value &= (1 << bit_size) - 1
+        selected_bits = frozenset(selected_bits)
+        changed_values = value ^ self.value
+        dirty = changed_values
+        for bit_index in selected_bits.symmetric_difference(self.selected_bits):
+            if bit_index < bit_size:
+                dirty |= 1 << bit_index
+
+        while dirty:
+            lowest = dirty & -dirty
+            dirty ^= lowest
+            bit_index = lowest.bit_length() - 1
+            self.update_cell(bit_index, (value >> bit_index) & 1, bit_index in selected_bits,
+                             changed_values & lowest)
+
+        self.value = value
+        self.selected_bits = selected_bits
+
+
+class VirtualBitGridRenderer(BitGridRenderer):
+    """虚拟化位画布渲染器：只绘制视口内可见的行，滚动时按需绘制、回收行"""
+
+    # 视口上下额外预绘制的行数，减少滚动和拖动选择时的空白
+    overscan_rows = 2
+
+    def __init__(self, canvas):
+        super().__init__(canvas)
+        # 已绘制的行号集合；cells只保存已绘制行的单元格
+        self.drawn_rows = set()
+        self.cells = {}
+
+    def reset(self):
+        super().reset()
+        self.drawn_rows = set()
+        self.cells = {}
+
+    def visible_rows(self):
+        """根据画布当前视口计算需要绘制的行范围"""
+        row_pitch = self.cell_height + self.row_spacing
+        top = self.canvas.canvasy(0) - self.start_y
+        bottom = self.canvas.canvasy(self.canvas.winfo_height()) - self.start_y
+        first = max(int(top // row_pitch) - self.overscan_rows, 0)
+        last = min(int(bottom // row_pitch) + self.overscan_rows, self.row_count() - 1)
+        return range(first, last + 1)
+
+    def build(self, value, bit_size, selected_bits):
+        self.start_build(value, bit_size, selected_bits)
+        self.drawn_rows = set()
+        self.cells = {}
+        self.refresh_viewport()
+
+    def draw_row(self, row):
+        tag = f"row{row}"
+        for bit_index in self.row_bits(row):
+            self.cells[bit_index] = self.draw_cell(bit_index, tags=(tag,))
+        self.drawn_rows.add(row)
+
+    def erase_row(self, row):
+        self.canvas.delete(f"row{row}")
+        for bit_index in self.row_bits(row):
+            del self.cells[bit_index]
+            self.item_count -= 3
+            self.items_deleted += 3
+        self.drawn_rows.discard(row)
+
+    def refresh_viewport(self):
+        """回收移出视口的行，绘制新进入视口的行"""
+        if self.bit_size is None:
+            return
+        wanted = self.visible_rows()
+        for row in [row for row in self.drawn_rows if row not in wanted]:
+            self.erase_row(row)
+        for row in wanted:
+            if row not in self.drawn_rows:
+                self.draw_row(row)
+
+    def render(self, value, bit_size, selected_bits):
+        """只比较已绘制行的位，更新耗时与总位宽无关"""
+        if bit_size != self.bit_size:
+            self.build(value, bit_size, selected_bits)
+            return
+
+        value &= (1 << bit_size) - 1
+        selected_bits = frozenset(selected_bits)
+        changed_selection = selected_bits.symmetric_difference(self.selected_bits)
+
+        for row in self.drawn_rows:
+            bits = self.row_bits(row)
+            low, row_mask = bits[-1], (1 << len(bits)) - 1
+            new_row = (value >> low) & row_mask
+            changed = new_row ^ ((self.value >> low) & row_mask)
+            for bit_index in bits:
+                offset = bit_index - low
+                value_changed = (changed >> offset) & 1
+                if value_changed or bit_index in changed_selection:
+                    self.update_cell(bit_index, (new_row >> offset) & 1,
+                                     bit_index in selected_bits, value_changed)
+
+        self.value = value
+        self.selected_bits = selected_bits
+
+
+class BitmapBitGridRenderer(BitGridRenderer):
+    """位图渲染器：每个位一个像素画到一张PhotoImage上，再整体放大显示在画布上
+
+    不显示位值和位索引，画布上只有一个图像元素。每次变化只按行批量重写值或选择状态变化的行，
+    再放大一次，适合以热力图的形式查看数万位的数值。
+    """
+
+    bits_per_row = 256
+    pixel_size = 3
+    cell_width = pixel_size
+    cell_height = pixel_size
+    row_spacing = 0
+    # 未选中/选中时位值0和1的颜色，与单元格的配色一致
+    colors = {(0, False): "#f08080", (1, False): "#90ee90", (0, True): "#ffffe0", (1, True): "#add8e6"}
+    # 没有选中位的行直接把二进制字符串逐字符替换为颜色
+    row_colors = str.maketrans({"0": colors[0, False] + " ", "1": colors[1, False] + " "})
+
+    def __init__(self, canvas):
+        super().__init__(canvas)
+        # 每位一个像素的原始图像，以及放大后显示在画布上的图像
+        self.image = None
+        self.zoomed = None
+        self.selection = 0
+        self.image_puts = 0
+
+    def reset(self):
+        super().reset()
+        self.image = None
+        self.zoomed = None
+
+    def build(self, value, bit_size, selected_bits):
+        self.start_build(value, bit_size, selected_bits)
+        self.selection = selection_mask(self.selected_bits)
+        width = min(bit_size, self.bits_per_row)
+        height = self.row_count()
+        self.image = tk.PhotoImage(master=self.canvas, width=width, height=height)
+        self.zoomed = tk.PhotoImage(master=self.canvas, width=width * self.pixel_size,
+                                    height=height * self.pixel_size)
+        self.canvas.create_image(self.start_x, self.start_y, image=self.zoomed, anchor=tk.NW)
+        self.item_count = 1
+        self.items_created += 1
+        self.put_rows(range(height))
+
+    def row_data(self, row):
+        """一行像素的颜色列表（Tcl列表形式，最高位在左）"""
+        bits = self.row_bits(row)
+        low, count = bits[-1], len(bits)
+        row_mask = (1 << count) - 1
+        text = format((self.value >> low) & row_mask, f"0{count}b")
+        selected = (self.selection >> low) & row_mask
+        if not selected:
+            return "{" + text.translate(self.row_colors) + "}"
+        colors = self.colors
+        marks = format(selected, f"0{count}b")
+        return "{" + " ".join(colors[bit == "1", mark == "1"] for bit, mark in zip(text, marks)) + "}"
+
+    def put_rows(self, rows):
+        """按连续的行分组批量写入像素，然后重新生成放大的图像"""
+        rows = sorted(rows)
+        i = 0
+        while i < len(rows):
+            j = i + 1
+            while j < len(rows) and rows[j] == rows[j - 1] + 1:
+                j += 1
+            self.image.put(" ".join(self.row_data(row) for row in rows[i:j]), to=(0, rows[i]))
+            self.image_puts += 1
+            i = j
+        if rows:
+            self.zoomed.tk.call(self.zoomed, "copy", self.image, "-zoom", self.pixel_size, self.pixel_size)
+            self.items_configured += 1
+
+    def render(self, value, bit_size, selected_bits):
+        """只重写值或选择状态发生变化的行"""
+        if bit_size != self.bit_size:
+            self.build(value, bit_size, selected_bits)
+            return
+
+        value &= (1 << bit_size) - 1
+        selected_bits = frozenset(selected_bits)
+        changed = value ^ self.value
+        rows = {(bit_size - 1 - bit_index) // self.bits_per_row
+                for bit_index in selected_bits.symmetric_difference(self.selected_bits) if bit_index < bit_size}
+        if changed:
+            for row in range(self.row_count()):
+                bits = self.row_bits(row)
+                if (changed >> bits[-1]) & ((1 << len(bits)) - 1):
+                    rows.add(row)
+
+        self.value = value
+        if selected_bits != self.selected_bits:
+            self.selected_bits = selected_bits
+            self.selection = selection_mask(selected_bits)
+        self.put_rows(rows)
+
+
+class StartupProfiler:
+    """记录启动各阶段的完成时间，输出每个阶段的耗时"""
+
+    def __init__(self, t0=STARTUP_T0):
+        self.t0 = t0
+        self.marks = []
+
+    def mark(self, phase):
+        self.marks.append((phase, time.perf_counter()))
+
+    def report(self, file=sys.stdout):
+        print(f"{'阶段':<16} {'耗时(ms)':>10} {'累计(ms)':>10}", file=file)
+        last = self.t0
+        for phase, t in self.marks:
+            print(f"{phase:<16} {(t - last) * 1000:>10.1f} {(t - self.t0) * 1000:>10.1f}", file=file)
+            last = t
+
+
+class UpdateScheduler:
+    """合并短时间内的重复刷新请求：同名任务在下一次空闲前只执行一次
+
+    delays中为任务名配置了延迟（毫秒）时改为防抖：每次请求都重新计时，
+    停止请求delay毫秒后才执行。
+    """
+
+    def __init__(self, root, delays=None):
+        self.root = root
+        self.delays = delays if delays is not None else {}
+        # 任务名 -> (after id, 回调)
+        self.pending = {}
+
+    def schedule(self, name, callback):
+        delay = self.delays.get(name, 0)
+        if name in self.pending:
+            after_id, _ = self.pending[name]
+            if not delay:
+                # 已在等待空闲时执行，只更新回调
+                self.pending[name] = (after_id, callback)
+                return
+            self.root.after_cancel(after_id)
+
+        if delay:
+            after_id = self.root.after(delay, self.run, name)
+        else:
+            after_id = self.root.after_idle(self.run, name)
+        self.pending[name] = (after_id, callback)
+
+    def run(self, name):
+        entry = self.pending.pop(name, None)
+        if entry is not None:
+            entry[1]()
+
+    def flush(self, name):
+        """立即执行尚未执行的任务"""
+        entry = self.pending.get(name)
+        if entry is not None:
+            self.root.after_cancel(entry[0])
+            self.run(name)
+
 
 class BinaryCalculator:
-    def __init__(self, root):
+    def __init__(self, root, profiler=None):
         self.root = root
+        self.profiler = profiler
         self.root.title("数值计算/查看工具")
         self.root.geometry("880x600")
 
@@ -22,48 +431,122 @@ class BinaryCalculator:
         # 位选择相关变量
         self.selected_bits = set()
         self.select_start = None
+        # 拖动选择的上一个终点，拖动时只增删两个终点之间变化的位
+        self.select_end = None
         self.is_selecting = False
         self.click_start_pos = None
+        # 位选择的提取计划缓存
+        self.selection_plan_bits = None
+        self.selection_plan_cache = None
 
         self.history = os.path.expanduser("~") + "/.bitwise_calculator_history.txt"
-        self.history_max_num = 100
+        self.history_max_num = 100000
+        self.history_store = HistoryStore(self.history, self.history_max_num)
+        # 下拉框只显示与输入前缀匹配、排序最靠前的若干条记录
+        self.history_dropdown_size = 50
+        self.history_query = ""
+        # 下拉框当前展示的(历史版本, 查询前缀)，两者都未变化时不刷新下拉框
+        self.history_combo_key = None
+
+        # 表达式编译缓存
+        self.expression_cache = ExpressionCache()
+        # 超过该位宽时位画布只绘制可见行
+        self.virtual_bit_threshold = 1024
+        # 超过该位宽时位画布改为位图显示（每位一个放大的像素，不显示文字）
+        self.bitmap_bit_threshold = 8192
+
+        # 位操作的撤销/重做记录（按异或差值保存），超过内存上限时淘汰最早的步骤
+        self.undo_max_bytes = 4 * 1024 * 1024
+        self.undo_history = UndoHistory(self.undo_max_bytes)
+
+        # 刷新调度：合并按键和拖动产生的重复刷新；
+        # 可为开销大的阶段设置防抖延迟（毫秒），0表示只合并到下一次空闲时执行
+        self.update_delays = {"bit_canvas": 0, "history": 0}
+        self.scheduler = UpdateScheduler(self.root, self.update_delays)
+
+        # 内存映射的二进制文件及当前查看的偏移
+        self.mapped_file = None
+        self.file_offset_var = tk.StringVar(value="0")
+
+        # 位模式查找：查找窗口、进行中的查找（生成器）及其数据源
+        self.search_window = None
+        self.search_job = None
+        self.search_max_hits = 10000
+
+        # 已加载的寄存器布局（名称 -> 布局）及当前使用的布局
+        self.register_layouts = {}
+        self.register_layout = None
+        self.layout_row_values = []
+
+        # 命名寄存器（名称 = 表达式），修改时只重算依赖它的寄存器
+        self.workspace = Workspace(self.bit_size_var.get(), self.scientific_mode_var.get())
+        self.register_display_base = None
+
+        # 首帧显示前只创建控件；历史记录加载和位画布绘制推迟到窗口映射之后
+        self.startup_complete = False
+        self.root.bind("<Map>", self.on_root_map, add="+")
 
         # 创建界面
         self.create_widgets()
 
+        # 重算流程的计时与计数，默认停用；F12打开调试浮窗时启用
+        self.perf = Instrumentation()
+        self.perf.attach(self, ["current_value_set", "detect_base", "update_history", "parse_expression",
+                                "calculate", "update_displays", "update_bit_display",
+                                "update_selection_display", "update_layout_display",
+                                "update_register_display"])
+        renderers = (self.full_bit_renderer, self.virtual_bit_renderer, self.bitmap_bit_renderer)
+        self.perf.add_counter("tk_items_created", lambda: sum(r.items_created for r in renderers))
+        self.perf.add_counter("tk_items_deleted", lambda: sum(r.items_deleted for r in renderers))
+        self.perf.add_counter("tk_items_configured", lambda: sum(r.items_configured for r in renderers))
+        self.perf.add_counter("tk_image_puts", lambda: self.bitmap_bit_renderer.image_puts)
+        self.perf_window = None
+        self.root.bind("<F12>", self.toggle_perf_overlay)
+        self.root.bind("<Control-z>", self.undo)
+        self.root.bind("<Control-y>", self.redo)
+        self.root.bind("<Control-Z>", self.redo)
+
+    def on_root_map(self, event):
+        if event.widget is not self.root or self.startup_complete:
+            return
+        self.startup_complete = True
+        # 等待首帧绘制完成后再执行延迟的启动工作
+        self.root.after_idle(self.finish_startup)
+
+    def finish_startup(self):
+        """首帧显示后加载历史记录（只从文件加载一次）并绘制位画布"""
+        if self.profiler:
+            self.profiler.mark("首帧显示")
+
+        self.load_history()
+        self.update_history()
+        self.update_displays()
+        self.scheduler.flush("bit_canvas")
+
+        if self.profiler:
+            self.root.update_idletasks()
+            self.profiler.mark("延迟加载")
+            # 启动分析模式：输出各阶段耗时后退出
+            self.profiler.report()
+            self.root.after_idle(self.root.destroy)
+
     def load_history(self):
         try:
-            if os.path.exists(self.history):
-                with open(self.history, "r") as f:
-                    return [line.strip() for line in f.readlines()]
-            return []
-        except FileNotFoundError:
-            with open(self.history, 'w', encoding='utf-8') as file:
-                file.write("")
-            messagebox.showerror("错误", f"历史记录文件未找到: {self.history}")
-            return []
+            self.history_store.load()
         except Exception as e:
             messagebox.showerror("错误", f"加载历史记录时出错: {e}")
-            return []
-
-    def save_history(self, history):
-        with open(self.history, "w") as f:
-            for item in history:
-                f.write(item + '\n')
 
     def update_history(self):
-        history = self.load_history()
-        history = history[::-1]  # 逆序排列历史记录
-        self.history_combo['values'] = history
+        key = (self.history_store.version, self.history_query)
+        if self.history_combo_key == key:
+            return
+        self.history_combo_key = key
+        # 按使用频率和最近使用时间排序
+        self.history_combo['values'] = self.history_store.search(self.history_query, self.history_dropdown_size)
 
     def append_history(self, value):
-        history = self.load_history()
-        if value in history:
-            history.remove(value)
-        history.append(value)
-        history = history[-self.history_max_num:]  # 保持最大记录数
-        self.save_history(history)
-        self.update_history()
+        if self.history_store.add(value):
+            self.update_history()
 
     def detect_base(self, value_str):
         if not value_str:
@@ -89,7 +572,7 @@ class BinaryCalculator:
 
         # 3. 自动识别位宽，2的整数次幂向上对齐
         try:
-            value = int(processed_value, detected_base)
+            value = parse_int(processed_value, detected_base)
 
             # 计算所需的最小位宽
             if value == 0:
@@ -122,7 +605,7 @@ class BinaryCalculator:
 
     def current_value_set(self, value):
         self.detect_base(value)
-        self.update_history()
+        self.scheduler.schedule("history", self.update_history)
         self.current_value.set(value)
 
     def update_current_value_display(self):
@@ -132,6 +615,7 @@ class BinaryCalculator:
     def on_history_select(self, event):
         selected_value = self.history_combo.get()
         if selected_value:
+            self.history_query = ""
             self.current_value_set(selected_value)
             self.calculate_and_update(add_to_history=True)
 
@@ -142,10 +626,19 @@ class BinaryCalculator:
             self.update_displays()
 
     def calculate_on_enter(self, event):
+        self.history_query = ""
         self.current_value_set(self.history_combo.get())
         self.calculate_and_update(add_to_history=True)
 
     def on_history_keyrelease(self, event):
+        # 回车已由calculate_on_enter计算并保存（赋值语句已经执行），松开回车时不再重新计算
+        if event.keysym in ('Return', 'KP_Enter'):
+            return
+        # 下拉框按输入的前缀过滤；连续按键时只在下一次空闲时重新计算一次
+        self.history_query = self.history_combo.get().strip()
+        self.scheduler.schedule("history_input", self.recompute_history_input)
+
+    def recompute_history_input(self):
         self.current_value_set(self.history_combo.get())
         self.calculate_and_update(add_to_history=False)
 
@@ -164,6 +657,21 @@ class BinaryCalculator:
         self.history_combo.bind('<Return>', self.calculate_on_enter)
         self.history_combo.bind('<KeyRelease>', self.on_history_keyrelease)
 
+        # 二进制文件查看区域：按偏移读取当前位宽的数值
+        file_frame = ttk.LabelFrame(main_frame, text="文件查看", padding="10")
+        file_frame.pack(fill=tk.X, pady=1)
+        ttk.Button(file_frame, text="打开文件", command=self.open_file).grid(row=0, column=0, padx=2, sticky=tk.W)
+        self.file_label = ttk.Label(file_frame, text="未打开文件")
+        self.file_label.grid(row=0, column=1, padx=2, sticky=tk.W)
+        ttk.Label(file_frame, text="偏移:").grid(row=0, column=2, padx=2, sticky=tk.W)
+        file_offset_entry = ttk.Entry(file_frame, textvariable=self.file_offset_var, width=14)
+        file_offset_entry.grid(row=0, column=3, padx=2, sticky=tk.W)
+        file_offset_entry.bind('<Return>', lambda event: self.load_file_window())
+        ttk.Button(file_frame, text="上一字", command=lambda: self.step_file_window(-1)).grid(row=0, column=4, padx=2, sticky=tk.W)
+        ttk.Button(file_frame, text="下一字", command=lambda: self.step_file_window(1)).grid(row=0, column=5, padx=2, sticky=tk.W)
+        ttk.Button(file_frame, text="查找模式", command=self.open_search_window).grid(row=0, column=6, padx=2, sticky=tk.W)
+        file_frame.grid_columnconfigure(1, weight=1)
+
         # 输入和进制选择区域
         input_frame = ttk.LabelFrame(main_frame, text="操作和进制", padding="10")
         input_frame.pack(fill=tk.X, pady=1)
@@ -176,33 +684,33 @@ class BinaryCalculator:
         self.entry.grid(row=0, column=1, columnspan=input_span, sticky=tk.EW, padx=2, pady=1)
 
         ttk.Label(input_frame, text="移位:").grid(row=0, column=input_span+1, padx=2, sticky=tk.W)
-        shift_spinbox = ttk.Spinbox(input_frame, from_=1, to=1024, width=5, textvariable=self.shift_amount_var)
+        shift_spinbox = ttk.Spinbox(input_frame, from_=1, to=BIT_SIZES[-1], width=5, textvariable=self.shift_amount_var)
         shift_spinbox.grid(row=0, column=input_span+2, padx=2, sticky=tk.W)
         ttk.Button(input_frame, text="<<", command=lambda: self.shift("left")).grid(row=0, column=input_span+3, padx=2, sticky=tk.W)
         ttk.Button(input_frame, text=">>", command=lambda: self.shift("right")).grid(row=0, column=input_span+4, padx=2, sticky=tk.W)
-        ttk.Button(input_frame, text="=", command=self.calculate).grid(row=0, column=input_span+5, padx=2, pady=1, sticky=tk.W)
+        # 回调通过lambda在调用时查找方法，启用计时后按钮触发的计算同样被计时
+        ttk.Button(input_frame, text="=", command=lambda: self.calculate()).grid(row=0, column=input_span+5, padx=2, pady=1, sticky=tk.W)
         ttk.Button(input_frame, text="C", command=self.clear).grid(row=0, column=input_span+6, padx=2, pady=1, sticky=tk.W)
 
         # 绑定输入事件，实现实时更新和Enter键计算
-        self.entry.bind('<KeyRelease>', lambda event: self.update_current_value_display())
+        self.entry.bind('<KeyRelease>', lambda event: self.scheduler.schedule("input", self.update_current_value_display))
         self.entry.bind('<Return>', self.calculate_on_enter)
 
         # 进制选择
         ttk.Label(input_frame, text="输入进制:").grid(row=1, column=0, sticky=tk.W, padx=2, pady=1)
         ttk.Radiobutton(input_frame, text="2进制", variable=self.base_var, value=2,
-                       command=self.update_displays).grid(row=1, column=1, padx=2, pady=1, sticky=tk.W)
+                       command=lambda: self.update_displays()).grid(row=1, column=1, padx=2, pady=1, sticky=tk.W)
         ttk.Radiobutton(input_frame, text="8进制", variable=self.base_var, value=8,
-                       command=self.update_displays).grid(row=1, column=2, padx=2, pady=1, sticky=tk.W)
+                       command=lambda: self.update_displays()).grid(row=1, column=2, padx=2, pady=1, sticky=tk.W)
         ttk.Radiobutton(input_frame, text="10进制", variable=self.base_var, value=10,
-                       command=self.update_displays).grid(row=1, column=3, padx=2, pady=1, sticky=tk.W)
+                       command=lambda: self.update_displays()).grid(row=1, column=3, padx=2, pady=1, sticky=tk.W)
         ttk.Radiobutton(input_frame, text="16进制", variable=self.base_var, value=16,
-                       command=self.update_displays).grid(row=1, column=4, padx=2, pady=1, sticky=tk.W)
+                       command=lambda: self.update_displays()).grid(row=1, column=4, padx=2, pady=1, sticky=tk.W)
 
         # 位大小选择
         ttk.Label(input_frame, text="位大小:").grid(row=1, column=5, sticky=tk.W, padx=2, pady=1)
         # 使用下拉选择框替代单选按钮
-        bit_sizes = [8, 16, 32, 64, 128, 256, 512, 1024]
-        self.bit_size_combo = ttk.Combobox(input_frame, textvariable=self.bit_size_var, values=bit_sizes, width=5)
+        self.bit_size_combo = ttk.Combobox(input_frame, textvariable=self.bit_size_var, values=BIT_SIZES, width=5)
         self.bit_size_combo.grid(row=1, column=6, padx=2, pady=1, sticky=tk.W)
         self.bit_size_combo.bind("<<ComboboxSelected>>", self.on_bit_size_event)
         self.bit_size_combo.bind('<KeyRelease>', self.on_bit_size_event)
@@ -253,6 +761,33 @@ class BinaryCalculator:
         self.hex_value.grid(row=3, column=1, sticky=tk.W, padx=2, pady=1)
         self.hex_value.config(state='readonly')
 
+        # 寄存器字段解码区域：加载布局后显示每个字段的值
+        layout_frame = ttk.LabelFrame(main_frame, text="寄存器字段", padding="10")
+        layout_frame.pack(fill=tk.X, pady=1)
+        layout_bar = ttk.Frame(layout_frame)
+        layout_bar.pack(fill=tk.X)
+        ttk.Button(layout_bar, text="加载布局", command=self.open_layout_file).pack(side=tk.LEFT, padx=2)
+        self.layout_combo = ttk.Combobox(layout_bar, state='readonly', width=24)
+        self.layout_combo.pack(side=tk.LEFT, padx=2)
+        self.layout_combo.bind('<<ComboboxSelected>>', self.on_layout_select)
+        self.layout_tree = ttk.Treeview(layout_frame, columns=("name", "bits", "hex", "value"),
+                                        show="headings", height=6)
+        for column, text, width in (("name", "字段", 120), ("bits", "位", 100),
+                                    ("hex", "十六进制", 140), ("value", "值", 200)):
+            self.layout_tree.heading(column, text=text)
+            self.layout_tree.column(column, width=width, anchor=tk.W)
+
+        # 命名寄存器区域：在输入框中输入 "名称 = 表达式" 定义寄存器
+        register_frame = ttk.LabelFrame(main_frame, text="寄存器（输入 名称 = 表达式 定义）", padding="10")
+        register_frame.pack(fill=tk.X, pady=1)
+        ttk.Button(register_frame, text="删除寄存器", command=self.remove_selected_registers).pack(anchor=tk.W, padx=2)
+        self.register_tree = ttk.Treeview(register_frame, columns=("name", "text", "value"),
+                                          show="headings", height=6)
+        for column, text, width in (("name", "名称", 120), ("text", "定义", 240), ("value", "值", 200)):
+            self.register_tree.heading(column, text=text)
+            self.register_tree.column(column, width=width, anchor=tk.W)
+        self.register_tree.bind("<Double-1>", self.on_register_double_click)
+
         # 位显示区域
         bit_frame = ttk.LabelFrame(main_frame, text="位显示", padding="10")
         bit_frame.pack(fill=tk.BOTH, expand=True, pady=1)
@@ -274,8 +809,12 @@ class BinaryCalculator:
                                    yscrollcommand=v_scrollbar.set,
                                    xscrollcommand=h_scrollbar.set)
         self.bit_canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.full_bit_renderer = BitGridRenderer(self.bit_canvas)
+        self.virtual_bit_renderer = VirtualBitGridRenderer(self.bit_canvas)
+        self.bitmap_bit_renderer = BitmapBitGridRenderer(self.bit_canvas)
+        self.bit_renderer = self.full_bit_renderer
 
-        v_scrollbar.config(command=self.bit_canvas.yview)
+        v_scrollbar.config(command=self.on_bit_canvas_yview)
         h_scrollbar.config(command=self.bit_canvas.xview)
 
         # 绑定鼠标事件到位画布
@@ -284,6 +823,8 @@ class BinaryCalculator:
         self.bit_canvas.bind("<ButtonRelease-1>", self.on_bit_release)
         # 添加双击事件，双击时改变位的值
         self.bit_canvas.bind("<Double-1>", self.on_bit_double_click)
+        # 画布尺寸变化时补绘新进入视口的行
+        self.bit_canvas.bind("<Configure>", lambda event: self.bit_renderer.refresh_viewport())
 
         # 位选择结果显示区域
         self.selection_frame = ttk.LabelFrame(display_container, text="位选择结果：未选择任何位", padding="10")
@@ -339,13 +880,12 @@ class BinaryCalculator:
             bits_needed = value.bit_length()
 
         # 找到最小的标准位宽
-        standard_sizes = [8, 16, 32, 64, 128, 256, 512, 1024]
-        for size in standard_sizes:
+        for size in BIT_SIZES:
             if bits_needed <= size:
                 return size
 
-        # 如果超过1024位，返回1024
-        return 1024
+        # 如果超过最大位宽，返回最大位宽
+        return BIT_SIZES[-1]
 
     def on_endian_change(self):
         """处理端序单选按钮变化"""
@@ -364,64 +904,267 @@ class BinaryCalculator:
             messagebox.showinfo("提示", "8位数据无需端序转换")
             return
 
-        # 根据位大小和新的端序状态执行转换
-        if bit_size == 16:
-            if is_little_endian:
-                # 转换为小端序
-                result = ((value & 0xFF) << 8) | ((value >> 8) & 0xFF)
-            else:
-                # 转换为大端序
-                result = ((value & 0xFF) << 8) | ((value >> 8) & 0xFF)
-        elif bit_size == 32:
-            if is_little_endian:
-                # 转换为小端序
-                result = ((value & 0xFF) << 24) | (((value >> 8) & 0xFF) << 16) | \
-                         (((value >> 16) & 0xFF) << 8) | ((value >> 24) & 0xFF)
-            else:
-                # 转换为大端序
-                result = ((value & 0xFF) << 24) | (((value >> 8) & 0xFF) << 16) | \
-                         (((value >> 16) & 0xFF) << 8) | ((value >> 24) & 0xFF)
-        elif bit_size == 64:
-            if is_little_endian:
-                # 转换为小端序
-                result = ((value & 0xFF) << 56) | (((value >> 8) & 0xFF) << 48) | \
-                         (((value >> 16) & 0xFF) << 40) | (((value >> 24) & 0xFF) << 32) | \
-                         (((value >> 32) & 0xFF) << 24) | (((value >> 40) & 0xFF) << 16) | \
-                         (((value >> 48) & 0xFF) << 8) | ((value >> 56) & 0xFF)
-            else:
-                # 转换为大端序
-                result = ((value & 0xFF) << 56) | (((value >> 8) & 0xFF) << 48) | \
-                         (((value >> 16) & 0xFF) << 40) | (((value >> 24) & 0xFF) << 32) | \
-                         (((value >> 32) & 0xFF) << 24) | (((value >> 40) & 0xFF) << 16) | \
-                         (((value >> 48) & 0xFF) << 8) | ((value >> 56) & 0xFF)
-        else:
-            # 按32bit为单位进行端序转换，但保持32bit之间的位置不变
-            dwords_needed = (bit_size + 31) // 32  # 计算需要的32位单元数量
-            bytes_needed = dwords_needed * 4  # 转换为字节数
+        # 64位及以下翻转整个值的字节序；更宽的值按32bit为单位进行端序转换，但保持32bit之间的位置不变
+        word_bits = None if bit_size <= 64 else 32
+        try:
+            result = byteswap(value, bit_size, word_bits)
+        except OverflowError:
+            messagebox.showerror("错误", f"无法处理{bit_size}位的端序转换")
+            return
 
-            try:
-                # 将数值转换为字节数组
-                value_bytes = value.to_bytes(bytes_needed, byteorder='big')  # 始终使用大端序作为中间表示
-
-                # 按32位(4字节)为单位处理每个单元
-                result_bytes = b''
-                for i in range(0, bytes_needed, 4):
-                    # 获取32位单元的4个字节
-                    dword_bytes = value_bytes[i:i+4]
-
-                    reversed_dword = dword_bytes[::-1]
-                    result_bytes += reversed_dword
-
-                # 从字节数组转换回整数
-                result = int.from_bytes(result_bytes, byteorder='big')
-            except OverflowError:
-                messagebox.showerror("错误", f"无法处理{bit_size}位的端序转换")
-                return
+        self.set_edited_value(value, result, endian=True)
+
+    def open_file(self):
+        """以内存映射方式打开二进制文件，并从偏移0开始查看"""
+        path = filedialog.askopenfilename(title="打开二进制文件")
+        if not path:
+            return
+        try:
+            mapped_file = MappedFile(path)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("错误", f"打开文件失败: {e}")
+            return
 
+        if self.search_window is not None:
+            # 之前的查找结果指向旧文件
+            self.stop_search()
+            self.search_results.delete(0, tk.END)
+        if self.mapped_file is not None:
+            self.mapped_file.close()
+        self.mapped_file = mapped_file
+        self.file_label.config(text=f"{os.path.basename(path)} ({mapped_file.size} 字节)")
+        self.file_offset_var.set("0")
+        self.load_file_window()
+
+    def file_offset(self):
+        """解析偏移输入，支持0x等前缀"""
+        try:
+            return int(self.file_offset_var.get().strip(), 0)
+        except ValueError:
+            return 0
+
+    def load_file_window(self, offset=None):
+        """按当前位宽和端序读取文件中offset处的数值并显示"""
+        if self.mapped_file is None:
+            return
+        bit_size = self.bit_size_var.get()
+        nbytes = (bit_size + 7) // 8
+        if offset is None:
+            offset = self.file_offset()
+        offset = self.mapped_file.clamp_offset(offset, nbytes)
+        self.file_offset_var.set(f"0x{offset:X}")
+
+        value = self.mapped_file.read_value(offset, bit_size, self.little_endian_var.get())
+        # 预读下一页，连续翻看时避免缺页等待
+        self.mapped_file.prefetch(offset + nbytes)
+
+        self.current_value_set(self.format_number(value, self.base_var.get()))
+        self.update_displays()
+
+    def step_file_window(self, direction):
+        """移动到上一个或下一个字（字宽为当前位宽）"""
+        if self.mapped_file is None:
+            return
+        nbytes = (self.bit_size_var.get() + 7) // 8
+        self.load_file_window(self.file_offset() + direction * nbytes)
+
+    def open_search_window(self):
+        """打开位模式查找窗口，值和掩码默认取当前值和位画布上选中的位"""
+        if self.search_window is not None:
+            self.search_window.lift()
+            return
+        bit_size = self.bit_size_var.get()
+        mask = selection_mask(self.selected_bits) or (1 << bit_size) - 1
+        value = self.get_current_value() & mask
+
+        window = self.search_window = tk.Toplevel(self.root)
+        window.title("位模式查找")
+        window.protocol("WM_DELETE_WINDOW", self.close_search_window)
+        form = ttk.Frame(window, padding="10")
+        form.pack(fill=tk.X)
+        self.search_value_var = tk.StringVar(value=f"0x{value:X}")
+        self.search_mask_var = tk.StringVar(value=f"0x{mask:X}")
+        self.search_bit_aligned_var = tk.BooleanVar(value=False)
+        ttk.Label(form, text="值:").grid(row=0, column=0, sticky=tk.W, padx=2)
+        ttk.Entry(form, textvariable=self.search_value_var, width=40).grid(row=0, column=1, sticky=tk.W, padx=2)
+        ttk.Label(form, text="掩码:").grid(row=1, column=0, sticky=tk.W, padx=2)
+        ttk.Entry(form, textvariable=self.search_mask_var, width=40).grid(row=1, column=1, sticky=tk.W, padx=2)
+        ttk.Checkbutton(form, text="按位对齐（默认按字节对齐）",
+                        variable=self.search_bit_aligned_var).grid(row=2, column=1, sticky=tk.W, padx=2)
+        ttk.Label(form, text="粘贴数据（十六进制，留空则查找已打开的文件）:").grid(row=3, column=0, columnspan=2, sticky=tk.W, padx=2)
+        self.search_data_text = tk.Text(form, font=("Courier", 10), width=60, height=4)
+        self.search_data_text.grid(row=4, column=0, columnspan=2, sticky=tk.EW, padx=2)
+
+        bar = ttk.Frame(window, padding=(10, 0))
+        bar.pack(fill=tk.X)
+        ttk.Button(bar, text="查找", command=self.start_search).pack(side=tk.LEFT, padx=2)
+        ttk.Button(bar, text="停止", command=self.stop_search).pack(side=tk.LEFT, padx=2)
+        self.search_progress = ttk.Progressbar(bar, maximum=1.0, length=200)
+        self.search_progress.pack(side=tk.LEFT, padx=2)
+        self.search_status = ttk.Label(bar, text="")
+        self.search_status.pack(side=tk.LEFT, padx=2)
+
+        self.search_results = tk.Listbox(window, font=("Courier", 10), height=12)
+        self.search_results.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        self.search_results.bind("<Double-1>", self.jump_to_search_hit)
+        self.search_results.bind("<Return>", self.jump_to_search_hit)
+
+    def close_search_window(self):
+        self.stop_search()
+        self.search_window.destroy()
+        self.search_window = None
+
+    def search_source(self):
+        """查找的数据源：粘贴的数据优先，否则为已打开的文件；都没有时返回None"""
+        text = "".join(self.search_data_text.get("1.0", tk.END).split())
+        if text:
+            if text[:2].lower() == "0x":
+                text = text[2:]
+            return bytes.fromhex(text)
+        if self.mapped_file is not None:
+            return self.mapped_file.mm
+        return None
+
+    def start_search(self):
+        """开始查找：结果分块产生，每次空闲时处理一部分，界面保持响应"""
+        self.stop_search()
         base = self.base_var.get()
-        self.current_value_set(self.format_number(result, base))
+        try:
+            value, mask = (parse_int(text, literal_base(text, base)) for text in
+                           (self.search_value_var.get().strip(), self.search_mask_var.get().strip()))
+            source = self.search_source()
+        except ValueError as e:
+            messagebox.showerror("错误", f"无效的输入: {e}", parent=self.search_window)
+            return
+        if source is None:
+            messagebox.showinfo("提示", "请先打开文件或粘贴数据", parent=self.search_window)
+            return
+
+        # 查找模块会导入NumPy，只在第一次查找时导入，不影响启动时间
+        from bitwise_search import search
+
+        bit_size = self.bit_size_var.get()
+        try:
+            chunks = search(source, value, mask, bit_size, self.little_endian_var.get(),
+                            self.search_bit_aligned_var.get())
+        except ValueError as e:
+            messagebox.showerror("错误", str(e), parent=self.search_window)
+            return
+
+        self.search_source_data = source
+        self.search_pattern = (value, mask, bit_size, self.little_endian_var.get())
+        self.search_hit_offsets = []
+        self.search_hit_count = 0
+        self.search_results.delete(0, tk.END)
+        self.search_progress['value'] = 0
+        self.search_job = chunks
+        self.search_total = max(len(source), 1)
+        self.root.after_idle(self.continue_search)
+
+    def continue_search(self):
+        """处理若干数据块（约30毫秒），更新进度和结果列表后让出事件循环"""
+        chunks = self.search_job
+        if chunks is None or self.search_window is None:
+            return
+        deadline = time.perf_counter() + 0.03
+        scanned = None
+        try:
+            while time.perf_counter() < deadline:
+                scanned, hits = next(chunks)
+                self.search_hit_count += len(hits)
+                room = self.search_max_hits - len(self.search_hit_offsets)
+                for offset in hits[:max(room, 0)]:
+                    self.search_hit_offsets.append(offset)
+                    self.search_results.insert(tk.END, f"字节 0x{offset // 8:X}  位 {offset % 8}")
+        except StopIteration:
+            self.search_job = None
+
+        if scanned is not None:
+            self.search_progress['value'] = scanned / self.search_total
+        status = f"找到 {self.search_hit_count} 处"
+        if self.search_hit_count > len(self.search_hit_offsets):
+            status += f"（只列出前 {len(self.search_hit_offsets)} 处）"
+        if self.search_job is None:
+            self.search_progress['value'] = 1.0
+            self.search_status.config(text=status)
+        else:
+            self.search_status.config(text=status + "，查找中...")
+            self.root.after(1, self.continue_search)
+
+    def stop_search(self):
+        if self.search_job is not None:
+            self.search_job = None
+            self.search_status.config(text=f"已停止，找到 {self.search_hit_count} 处")
+
+    def jump_to_search_hit(self, event=None):
+        """在位画布中显示命中处的数值，并选中模式覆盖的位"""
+        selection = self.search_results.curselection()
+        if not selection:
+            return
+        offset = self.search_hit_offsets[selection[0]]
+        value, mask, bit_size, little_endian = self.search_pattern
+        self.bit_size_var.set(bit_size)
+        self.little_endian_var.set(little_endian)
+        self.pre_endian_var = little_endian
+        byte_offset, shift = divmod(offset, 8)
+
+        source = self.search_source_data
+        if self.mapped_file is not None and source is self.mapped_file.mm:
+            self.file_offset_var.set(f"0x{byte_offset:X}")
+            self.load_file_window(byte_offset)
+            # 文件末尾附近的窗口会被向前对齐，模式在窗口中的位置随之移动
+            shift += (byte_offset - self.file_offset()) * 8
+        else:
+            nbytes = (bit_size + 7) // 8
+            data = source[byte_offset:byte_offset + nbytes].ljust(nbytes, b'\0')
+            window = int.from_bytes(data, 'little' if little_endian else 'big') & ((1 << bit_size) - 1)
+            self.current_value_set(self.format_number(window, self.base_var.get()))
+
+        # 小端时模式在窗口中向高位移动，大端时向低位移动
+        mask = mask << shift if little_endian else mask >> shift
+        self.selected_bits = {bit for bit in range(bit_size) if mask >> bit & 1}
         self.update_displays()
 
+    def toggle_perf_overlay(self, event=None):
+        """打开或关闭性能调试浮窗；浮窗打开期间启用计时"""
+        if self.perf_window is not None:
+            self.close_perf_overlay()
+            return
+
+        self.perf.enable()
+        self.perf_window = tk.Toplevel(self.root)
+        self.perf_window.title("性能统计")
+        self.perf_window.attributes('-topmost', True)
+        self.perf_window.protocol("WM_DELETE_WINDOW", self.close_perf_overlay)
+        self.perf_text = tk.Text(self.perf_window, font=("Courier", 10), width=72, height=16)
+        self.perf_text.pack(fill=tk.BOTH, expand=True)
+        buttons = ttk.Frame(self.perf_window)
+        buttons.pack(fill=tk.X)
+        ttk.Button(buttons, text="重置", command=self.perf.reset).pack(side=tk.LEFT, padx=2, pady=2)
+        ttk.Button(buttons, text="导出JSON", command=self.export_perf_json).pack(side=tk.LEFT, padx=2, pady=2)
+        self.refresh_perf_overlay()
+
+    def refresh_perf_overlay(self):
+        if self.perf_window is None:
+            return
+        self.perf_text.delete("1.0", tk.END)
+        self.perf_text.insert("1.0", self.perf.format_table())
+        self.perf_window.after(500, self.refresh_perf_overlay)
+
+    def close_perf_overlay(self):
+        self.perf.disable()
+        self.perf_window.destroy()
+        self.perf_window = None
+
+    def export_perf_json(self):
+        path = filedialog.asksaveasfilename(title="导出性能统计", defaultextension=".json",
+                                            filetypes=[("JSON", "*.json")])
+        if path:
+            try:
+                self.perf.dump_json(path)
+            except OSError as e:
+                messagebox.showerror("错误", f"导出失败: {e}")
+
     def toggle_always_on_top(self):
         """切换窗口置顶状态"""
         self.root.attributes('-topmost', self.always_on_top_var.get())
@@ -442,7 +1185,7 @@ class BinaryCalculator:
                 return 0
 
             base = self.base_var.get()
-            value = int(value_str, base)
+            value = parse_int(value_str, base)
 
             # 根据位大小进行截断
             bit_size = self.bit_size_var.get()
@@ -458,44 +1201,7 @@ class BinaryCalculator:
 
     def format_number(self, value, base):
         """根据进制格式化数字，支持整数和浮点数"""
-        # 如果是浮点数，只支持十进制格式化
-        if isinstance(value, float):
-            # 检查是否是整数形式的浮点数
-            if value.is_integer():
-                return str(int(value))
-
-            # 处理浮点数精度问题，对于小数结果进行适当的四舍五入
-            # 尝试检测并修复常见的精度问题，如0.1+0.2=0.30000000000000004
-            # 先尝试格式化为15位有效数字
-            rounded_value = round(value, 15)
-            # 然后检查是否可以用更少的小数位表示
-            for i in range(15, 0, -1):
-                test_value = round(value, i)
-                if abs(test_value - value) < 1e-10:
-                    rounded_value = test_value
-                    break
-
-            # 转换为字符串并移除末尾的0
-            str_value = str(rounded_value)
-            # 检查是否有小数点，并且小数点后只有0
-            if '.' in str_value:
-                # 移除末尾的0
-                str_value = str_value.rstrip('0')
-                # 如果小数点后没有数字，移除小数点
-                if str_value.endswith('.'):
-                    str_value = str_value[:-1]
-
-            return str_value
-
-        # 整数的格式化
-        if base == 2:
-            return bin(value)
-        elif base == 8:
-            return oct(value)
-        elif base == 10:
-            return str(value)
-        elif base == 16:
-            return '0x' + hex(value)[2:].upper()
+        return format_number(value, base)
 
     def update_displays(self, event=None):
         """更新所有显示"""
@@ -517,7 +1223,7 @@ class BinaryCalculator:
         # 十进制值显示
         self.decimal_value.config(state='normal')
         self.decimal_value.delete(0, tk.END)
-        self.decimal_value.insert(0, f"{str(value)}")
+        self.decimal_value.insert(0, int_to_str(value, 10))
         self.decimal_value.config(state='readonly')
 
         # 十六进制值显示
@@ -526,90 +1232,50 @@ class BinaryCalculator:
         self.hex_value.insert(0, f"{hex(value)[2:].upper()}")
         self.hex_value.config(state='readonly')
 
-        # 更新位显示
-        self.update_bit_display(value)
+        # 更新位显示：画布刷新开销较大，合并到空闲时执行；首帧显示前不绘制
+        self.bit_display_value = value
+        if self.startup_complete:
+            self.scheduler.schedule("bit_canvas", lambda: self.update_bit_display(self.bit_display_value))
 
         # 更新位选择结果
-        self.update_selection_display()
+        self.update_selection_display(value)
+
+        # 更新寄存器字段
+        self.update_layout_display(value)
+
+        # 位大小、计算模式或显示进制变化时刷新命名寄存器
+        self.sync_workspace()
 
     def update_bit_display(self, value):
         """更新位可视化显示"""
-        self.bit_canvas.delete("all")
-
         bit_size = self.bit_size_var.get()
-        bits = format(value, f'0{bit_size}b')
-
-        # 固定每行显示32位，确保32位和64位的每行宽度一致
-        rows = 1 if bit_size <= 32 else 2
-        bits_per_row = 32
-
-        # 增大单元格宽度和高度，使位显示更清晰
-        cell_width = 25  # 从20增加到25
-        cell_height = 25  # 从20增加到25
-        start_x = 10
-        start_y = 10
-
-        # 计算需要的行数
-        rows = (bit_size + bits_per_row - 1) // bits_per_row
-
-        # 计算画布所需尺寸
-        canvas_width = bits_per_row * cell_width + 20
-        canvas_height = rows * (cell_height + 20) + 20
-
-        self.bit_canvas.config(scrollregion=(0, 0, canvas_width, canvas_height))
-
-        # 存储位矩形的位置信息，用于点击检测
-        self.bit_rects = {}
-
-        for row in range(rows):
-            # 计算当前行显示的位
-            start_bit = row * bits_per_row
-            end_bit = min((row + 1) * bits_per_row, bit_size)
-            row_bits = bits[start_bit:end_bit]
-
-            for i, bit in enumerate(row_bits):
-                x = start_x + i * cell_width
-                y = start_y + row * (cell_height + 20)  # 行间距
-
-                # 计算实际位索引（从最高位到最低位）
-                bit_index = bit_size - (start_bit + i) - 1
-
-                # 确定颜色：选中位使用不同颜色
-                if bit_index in self.selected_bits:
-                    color = "lightblue" if bit == '1' else "lightyellow"
-                else:
-                    color = "lightgreen" if bit == '1' else "lightcoral"
-
-                # 绘制位值框
-                rect_id = self.bit_canvas.create_rectangle(x, y, x + cell_width, y + cell_height,
-                                               fill=color, outline="black", width=1)
-
-                # 存储矩形信息用于点击检测
-                self.bit_rects[rect_id] = bit_index
+        if bit_size > self.bitmap_bit_threshold:
+            renderer = self.bitmap_bit_renderer
+        elif bit_size > self.virtual_bit_threshold:
+            renderer = self.virtual_bit_renderer
+        else:
+            renderer = self.full_bit_renderer
+        if renderer is not self.bit_renderer:
+            # 切换渲染模式：原渲染器的画布元素将被清除
+            self.bit_renderer.reset()
+            self.bit_renderer = renderer
 
-                # 绘制位值
-                font_size = 8 if cell_width < 15 else 10
-                self.bit_canvas.create_text(x + cell_width/2, y + cell_height/2,
-                                          text=bit, font=("Arial", font_size, "bold"))
+        renderer.render(value, bit_size, self.selected_bits)
 
-                # 每隔4位显示一次位索引，避免过于拥挤
-                if bit_index % 1 == 0:
-                    self.bit_canvas.create_text(x + cell_width/2, y + cell_height + 8,
-                                              text=str(bit_index), font=("Arial", 6))
+    def on_bit_canvas_yview(self, *args):
+        """滚动条回调：滚动画布后绘制新进入视口的行"""
+        self.bit_canvas.yview(*args)
+        self.bit_renderer.refresh_viewport()
 
     def on_bit_double_click(self, event):
         """处理位双击事件，双击时改变位的值"""
         x = self.bit_canvas.canvasx(event.x)
         y = self.bit_canvas.canvasy(event.y)
 
-        # 找到被双击的矩形
-        clicked_items = self.bit_canvas.find_overlapping(x, y, x, y)
-
-        for item in clicked_items:
-            if item in self.bit_rects:
-                bit_index = self.bit_rects[item]
-                self.toggle_bit(bit_index)
-                break
+        # 找到被双击的位
+        bit_index = self.bit_renderer.bit_at(x, y)
+        if bit_index is not None:
+            self.toggle_bit(bit_index)
 
     def on_bit_click(self, event):
         """处理位点击事件"""
@@ -619,54 +1285,55 @@ class BinaryCalculator:
         x = self.bit_canvas.canvasx(event.x)
         y = self.bit_canvas.canvasy(event.y)
 
-        # 找到被点击的矩形
-        clicked_items = self.bit_canvas.find_overlapping(x, y, x, y)
-
-        for item in clicked_items:
-            if item in self.bit_rects:
-                bit_index = self.bit_rects[item]
-
-                # 如果按住了Shift键，则添加到选择集（不连续选择）
-                if event.state & 0x1:  # Shift键
-                    if bit_index in self.selected_bits:
-                        self.selected_bits.remove(bit_index)
-                    else:
-                        self.selected_bits.add(bit_index)
-                    self.update_displays()
-                else:
-                    # 普通点击：选择单个位（不连续）
-                    self.is_selecting = True
-                    self.select_start = bit_index
-                    self.selected_bits.clear()
-                    self.selected_bits.add(bit_index)
-                    self.update_displays()
-                break
+        # 找到被点击的位
+        bit_index = self.bit_renderer.bit_at(x, y)
+        if bit_index is None:
+            return
+
+        # 如果按住了Shift键，则添加到选择集（不连续选择）
+        if event.state & 0x1:  # Shift键
+            if bit_index in self.selected_bits:
+                self.selected_bits.remove(bit_index)
+            else:
+                self.selected_bits.add(bit_index)
+            self.update_displays()
+        else:
+            # 普通点击：选择单个位（不连续）
+            self.is_selecting = True
+            self.select_start = bit_index
+            self.select_end = bit_index
+            self.selected_bits.clear()
+            self.selected_bits.add(bit_index)
+            self.update_displays()
 
     def on_bit_drag(self, event):
         """处理位拖动选择事件"""
         if not self.is_selecting:
             return
 
+        # 拖动到画布上下边缘之外时自动滚动，使尚未绘制的行进入视口
+        if event.y < 0:
+            self.on_bit_canvas_yview("scroll", -1, "units")
+        elif event.y > self.bit_canvas.winfo_height():
+            self.on_bit_canvas_yview("scroll", 1, "units")
+
         x = self.bit_canvas.canvasx(event.x)
         y = self.bit_canvas.canvasy(event.y)
 
-        # 找到被拖动的矩形
-        dragged_items = self.bit_canvas.find_overlapping(x, y, x, y)
-
-        for item in dragged_items:
-            if item in self.bit_rects:
-                bit_index = self.bit_rects[item]
-
-                # 选择从起始点到当前点的所有位
-                self.selected_bits.clear()
-                start = min(self.select_start, bit_index)
-                end = max(self.select_start, bit_index)
+        # 找到被拖动到的位，仍在上一个终点上时不需要更新
+        bit_index = self.bit_renderer.bit_at(x, y)
+        if bit_index is None or bit_index == self.select_end:
+            return
 
-                for i in range(start, end + 1):
-                    self.selected_bits.add(i)
+        # 选择从起始点到当前点的所有位：两个区间都包含起始点，只增删区间两端的差
+        old_lo, old_hi = sorted((self.select_start, self.select_end))
+        new_lo, new_hi = sorted((self.select_start, bit_index))
+        self.selected_bits.difference_update(range(old_lo, new_lo), range(new_hi + 1, old_hi + 1))
+        self.selected_bits.update(range(new_lo, old_lo), range(old_hi + 1, new_hi + 1))
+        self.select_end = bit_index
 
-                self.update_displays()
-                break
+        # 拖动时事件频繁，合并到空闲时刷新
+        self.scheduler.schedule("displays", self.update_displays)
 
     def on_bit_release(self, event):
         """处理位释放事件"""
@@ -685,16 +1352,30 @@ class BinaryCalculator:
         mask = 1 << bit_index
         new_value = value ^ mask  # 使用异或操作切换位
 
-        base = self.base_var.get()
-        self.current_value_set(self.format_number(new_value, base))
-
         # 切换完位值后，将该位添加到选择集中
         self.selected_bits.clear()
         self.selected_bits.add(bit_index)
-        self.update_displays()
-
-    def update_selection_display(self):
-        """更新位选择结果显示"""
+        self.set_edited_value(value, new_value)
+
+    def selection_plan(self):
+        """返回当前选择的提取计划和标题，选择未变化时复用上次的结果"""
+        if self.selection_plan_bits != self.selected_bits:
+            bits = frozenset(self.selected_bits)
+            runs = selection_runs(bits)
+            if len(runs) == 1:
+                # 如果是连续选择，显示范围
+                lo, width, _ = runs[0]
+                title = f"位选择结果：选择了位 {lo + width - 1} 到 {lo} (共 {len(bits)} 位)"
+            else:
+                # 如果是不连续选择，列出所有选中的位
+                bit_list = ", ".join(str(bit) for bit in sorted(bits))
+                title = f"位选择结果：选择了位: {bit_list} (共 {len(bits)} 位)"
+            self.selection_plan_bits = bits
+            self.selection_plan_cache = (runs, title)
+        return self.selection_plan_cache
+
+    def update_selection_display(self, value=None):
+        """更新位选择结果显示，value为已解析的当前值，未提供时重新获取"""
         if not self.selected_bits:
             self.selection_frame.config(text="位选择结果：未选择任何位")
             # 清空所有文本框
@@ -704,35 +1385,21 @@ class BinaryCalculator:
                 entry.config(state='readonly')
             return
 
-        # 计算选中的位的值
-        selected_value = 0
+        if value is None:
+            value = self.get_current_value()
 
-        # 排序选中的位，方便显示
-        sorted_bits = sorted(self.selected_bits)
-        min_bit = sorted_bits[0]
-        max_bit = sorted_bits[-1]
-
-        # 检查是否是连续的位选择
-        is_contiguous = all(sorted_bits[i] == sorted_bits[i-1] + 1 for i in range(1, len(sorted_bits)))
-
-        for bit_count, bit_index in enumerate(sorted_bits):
-            current_value = self.get_current_value()
-            if (current_value >> bit_index) & 1:
-                selected_value |= (1 << bit_count)
+        # 按提取计划计算选中的位的值：连续选择一次移位和掩码，不连续选择按区间拼接
+        runs, title = self.selection_plan()
+        selected_value = gather_bits(value, runs)
+        bit_count = len(self.selection_plan_bits)
 
         # 更新选择信息
-        if is_contiguous:
-            # 如果是连续选择，显示范围
-            self.selection_frame.config(text=f"位选择结果：选择了位 {max_bit} 到 {min_bit} (共 {len(self.selected_bits)} 位)")
-        else:
-            # 如果是不连续选择，列出所有选中的位
-            bit_list = ", ".join(str(bit) for bit in sorted_bits)
-            self.selection_frame.config(text=f"位选择结果：选择了位: {bit_list} (共 {len(self.selected_bits)} 位)")
+        self.selection_frame.config(text=title)
 
         # 二进制值显示
         self.selected_binary_value.config(state='normal')
         self.selected_binary_value.delete(0, tk.END)
-        self.selected_binary_value.insert(0, f"{format(selected_value, f'0{bit_count+1}b')}")
+        self.selected_binary_value.insert(0, f"{format(selected_value, f'0{bit_count}b')}")
         self.selected_binary_value.config(state='readonly')
 
         # 八进制值显示
@@ -744,7 +1411,7 @@ class BinaryCalculator:
         # 十进制值显示
         self.selected_decimal_value.config(state='normal')
         self.selected_decimal_value.delete(0, tk.END)
-        self.selected_decimal_value.insert(0, f"{selected_value}")
+        self.selected_decimal_value.insert(0, int_to_str(selected_value, 10))
         self.selected_decimal_value.config(state='readonly')
 
         # 十六进制值显示
@@ -753,6 +1420,52 @@ class BinaryCalculator:
         self.selected_hex_value.insert(0, f"{format(selected_value, f'0X')}")
         self.selected_hex_value.config(state='readonly')
 
+    def open_layout_file(self):
+        """加载寄存器布局文件（JSON）"""
+        path = filedialog.askopenfilename(title="加载寄存器布局",
+                                          filetypes=[("JSON", "*.json"), ("所有文件", "*")])
+        if not path:
+            return
+        try:
+            layouts = load_layouts(path)
+        except Exception as e:
+            messagebox.showerror("错误", f"加载寄存器布局失败: {e}")
+            return
+        if not layouts:
+            return
+
+        self.register_layouts = {layout.name: layout for layout in layouts}
+        self.layout_combo['values'] = list(self.register_layouts)
+        self.layout_combo.set(layouts[0].name)
+        self.set_register_layout(layouts[0])
+
+    def on_layout_select(self, event):
+        layout = self.register_layouts.get(self.layout_combo.get())
+        if layout is not None:
+            self.set_register_layout(layout)
+
+    def set_register_layout(self, layout):
+        """切换寄存器布局：每个字段对应一行，之后只更新值发生变化的行"""
+        self.register_layout = layout
+        self.layout_tree.delete(*self.layout_tree.get_children())
+        for index, field in enumerate(layout.fields):
+            self.layout_tree.insert("", tk.END, iid=str(index), values=(field.name, field.bits_text(), "", ""))
+        self.layout_row_values = [None] * len(layout.fields)
+        self.layout_tree.pack(fill=tk.X, pady=(5, 0))
+        self.update_layout_display(self.get_current_value())
+
+    def update_layout_display(self, value):
+        """一次调用解码全部字段，只刷新值发生变化的行"""
+        layout = self.register_layout
+        if layout is None:
+            return
+        for index, (field, raw) in enumerate(zip(layout.fields, layout.decode(value))):
+            if self.layout_row_values[index] == raw:
+                continue
+            self.layout_row_values[index] = raw
+            self.layout_tree.item(str(index), values=(field.name, field.bits_text(),
+                                                      f"0x{raw & ((1 << field.width) - 1):X}", field.format(raw)))
+
     def clear_selection(self):
         """清除位选择"""
         self.selected_bits.clear()
@@ -764,19 +1477,14 @@ class BinaryCalculator:
             return
 
         value = self.get_current_value()
-
-        for bit_index in self.selected_bits:
-            mask = 1 << bit_index
-            value ^= mask  # 使用异或操作切换位
-
-        base = self.base_var.get()
-        self.current_value_set(self.format_number(value, base))
-        self.update_displays()
+        # 使用异或操作切换全部选中的位
+        self.set_edited_value(value, value ^ selection_mask(self.selected_bits))
 
     def calculate_and_update(self, add_to_history=True):
         # 检查当前输入是否包含运算符
         expression = self.current_value_get()
-        if any(op in expression for op in '+-*/&|^'):
+        # 赋值语句、函数调用和单独的寄存器名称同样作为表达式计算
+        if any(op in expression for op in EXPRESSION_CHARS) or expression.strip() in self.workspace:
             self.calculate(add_to_history=add_to_history)
         else:
             # 如果没有运算符，只是更新显示
@@ -785,195 +1493,73 @@ class BinaryCalculator:
             self.update_current_value_display()
             self.update_displays()
 
-    def parse_expression(self, expression):
-        # 简单的词法分析器将表达式分解为标记
-        def tokenize(expr, scientific_mode):
-            tokens = []
-            i = 0
-            while i < len(expr):
-                char = expr[i]
-                if char.isspace():
-                    i += 1
-                elif char.isdigit() or (char == '.' and scientific_mode):
-                    # 解析数字（在科学计算模式下支持小数）
-                    start = i
-                    has_decimal = False
-                    has_exponent = False
-                    if char == '.' and scientific_mode:
-                        has_decimal = True
-                        i += 1
-                    # 收集数字部分
-                    while i < len(expr):
-                        if expr[i].isdigit() or expr[i] == '_':
-                            i += 1
-                        elif expr[i] == '.' and not has_decimal and scientific_mode:
-                            has_decimal = True
-                            i += 1
-                        elif (expr[i].lower() == 'e' and i+1 < len(expr) and
-                              (expr[i+1].isdigit() or expr[i+1] in ['+', '-'])) and not has_exponent:
-                            has_exponent = True
-                            i += 1
-                            # 处理指数部分的符号
-                            if i < len(expr) and expr[i] in ['+', '-']:
-                                i += 1
-                        else:
-                            break
-                    # 确保我们已经收集了完整的数字
-                    while i < len(expr) and expr[i].isdigit():
-                        i += 1
-                    tokens.append(('NUMBER', expr[start:i]))
-                elif char == '0' and i + 1 < len(expr) and expr[i+1].lower() in ['x', 'b', 'd']:
-                    # 处理以0x、0b或0d开头的数字
-                    start = i
-                    i += 2  # 跳过0和x/b
-                    while i < len(expr) and (expr[i].isalnum() or expr[i] == '_'):
-                        i += 1
-                    tokens.append(('NUMBER', expr[start:i]))
-                elif char in '+-*/&|^()<<>>':
-                    # 解析运算符和括号
-                    if char == '<' and i+1 < len(expr) and expr[i+1] == '<':
-                        tokens.append(('OPERATOR', '<<'))
-                        i += 2
-                    elif char == '>' and i+1 < len(expr) and expr[i+1] == '>':
-                        tokens.append(('OPERATOR', '>>'))
-                        i += 2
-                    else:
-                        tokens.append(('OPERATOR', char))
-                        i += 1
-                else:
-                    # 检查是否是单独的'0b'、'0x'或'0d'
-                    if i + 1 < len(expr) and expr[i:i+2].lower() == '0b':
-                        tokens.append(('NUMBER', expr[i:i+2]))
-                        i += 2
-                    elif i + 1 < len(expr) and expr[i:i+2].lower() == '0x':
-                        tokens.append(('NUMBER', expr[i:i+2]))
-                        i += 2
-                    elif i + 1 < len(expr) and expr[i:i+2].lower() == '0d':
-                        tokens.append(('NUMBER', expr[i:i+2]))
-                        i += 2
-                    else:
-                        raise ValueError(f"Invalid character in expression: {char}")
-            return tokens
-
-        # 递归下降解析器实现
-        def parse(tokens, scientific_mode):
-            i = [0]  # 使用列表作为可变对象来跟踪位置
-
-            def parse_expression():  # 处理加减法
-                left = parse_term()
-                while i[0] < len(tokens) and tokens[i[0]][1] in ['+', '-']:
-                    op = tokens[i[0]][1]
-                    i[0] += 1
-                    right = parse_term()
-                    if op == '+' :
-                        left = left + right
-                    else:
-                        left = left - right
-                return left
-
-            def parse_term():  # 处理乘除法
-                left = parse_factor()
-                while i[0] < len(tokens) and tokens[i[0]][1] in ['*', '/']:
-                    op = tokens[i[0]][1]
-                    i[0] += 1
-                    right = parse_factor()
-                    if op == '*':
-                        left = left * right
-                    else:
-                        # 在科学计算模式下使用浮点数除法，否则使用整数除法
-                        if scientific_mode:
-                            left = left / right  # 浮点数除法
-                        else:
-                            left = left // right  # 整数除法
-                return left
-
-            def parse_factor():  # 处理位运算和括号
-                left = parse_atom()
-                while i[0] < len(tokens) and tokens[i[0]][1] in ['&', '|', '^', '<<', '>>']:
-                    op = tokens[i[0]][1]
-                    i[0] += 1
-                    right = parse_atom()
-                    if op == '&':
-                        left = left & right
-                    elif op == '|':
-                        left = left | right
-                    elif op == '^':
-                        if self.scientific_mode_var.get():
-                            # 科学计算模式下，^ 作为次方操作
-                            left = left ** right
-                        else:
-                            # 普通模式下，^ 作为异或操作
-                            left = left ^ right
-                    elif op == '<<':
-                        left = left << right
-                    elif op == '>>':
-                        left = left >> right
-                return left
-
-            def parse_atom():
-                token = tokens[i[0]]
-                i[0] += 1
-                if token[0] == 'NUMBER':
-                    # 处理不同进制的数字
-                    num_str = token[1].lower()
-
-                    # 特殊处理：单独的0b或0x作为十进制0处理
-                    if num_str == '0b' or num_str == '0x' or num_str == '0d':
-                        return 0
-
-                    # 处理不同进制的数字
-                    if num_str.startswith('0x'):
-                        try:
-                            return int(num_str, 16)
-                        except ValueError:
-                            # 如果无法解析为十六进制，则作为十进制0处理
-                            return 0
-                    elif num_str.startswith('0b'):
-                        try:
-                            return int(num_str, 2)
-                        except ValueError:
-                            # 如果无法解析为二进制，则作为十进制0处理
-                            return 0
-                    elif num_str.startswith('0d'):
-                        try:
-                            # 0d前缀表示十进制
-                            return int(num_str[2:].replace('_', ''))
-                        except ValueError:
-                            # 如果无法解析为十进制，则作为十进制0处理
-                            return 0
-                    else:
-                        # 尝试转换为十进制（包括科学记数法）
-                        try:
-                            # 直接使用float转换，它能处理科学记数法
-                            float_val = float(num_str.replace('_', ''))
-                            # 如果是整数形式的浮点数但不是科学记数法，返回整数
-                            if float_val.is_integer() and 'e' not in num_str.lower():
-                                return int(float_val)
-                            return float_val
-                        except ValueError:
-                            # 可能是十六进制但没有前缀
-                            try:
-                                return int(num_str.replace('_', ''), 16)
-                            except ValueError:
-                                raise ValueError(f"Invalid number format: {num_str}")
-                elif token[1] == '(':
-                    expr_val = parse_expression()
-                    # 确保右括号存在
-                    if i[0] >= len(tokens) or tokens[i[0]][1] != ')':
-                        raise ValueError("Missing closing parenthesis")
-                    i[0] += 1
-                    return expr_val
-                else:
-                    raise ValueError(f"Unexpected token: {token}")
-
-            return parse_expression()
-
+    def parse_expression(self, expression, commit=True):
+        """计算表达式的值，编译结果按(表达式, 科学计算模式, 位大小)缓存；表达式无效时返回None
+
+        引用寄存器的表达式和赋值语句由寄存器工作区计算，commit为False时赋值语句只计算不保存。
+        """
+        result = self.expression_cache.evaluate(expression, self.scientific_mode_var.get(),
+                                                self.bit_size_var.get())
+        if result is None:
+            result = self.evaluate_registers(expression, commit)
+        return result
+
+    def evaluate_registers(self, expression, commit):
+        """计算引用寄存器的表达式或执行赋值语句，返回表达式（或被赋值寄存器）的值"""
+        self.sync_workspace()
+        assignment = parse_assignment(expression)
+        if assignment is None:
+            return self.workspace.evaluate(expression)
+        name, text = assignment
+        if not commit:
+            return self.workspace.preview(name, text)
         try:
-            tokens = tokenize(expression, self.scientific_mode_var.get())
-            result = parse(tokens, self.scientific_mode_var.get())
-            return result
-        except Exception as e:
+            changed = self.workspace.assign(name, text)
+        except ValueError:
             return None
+        self.update_register_display([name, *changed])
+        return self.workspace.value(name)
+
+    def sync_workspace(self):
+        """位大小或科学计算模式变化时重算全部寄存器"""
+        changed = self.workspace.configure(self.bit_size_var.get(), self.scientific_mode_var.get())
+        self.update_register_display(changed)
+
+    def update_register_display(self, names=()):
+        """只刷新指定的寄存器行；显示进制变化时刷新全部行"""
+        base = self.base_var.get()
+        registers = self.workspace.registers
+        if base != self.register_display_base:
+            self.register_display_base = base
+            names = list(registers)
+        tree = self.register_tree
+        for name in names:
+            register = registers.get(name)
+            if register is None:
+                if tree.exists(name):
+                    tree.delete(name)
+                continue
+            text = "" if register.value is None else self.format_number(register.value, base)
+            if tree.exists(name):
+                tree.item(name, values=(name, register.text, text))
+            else:
+                tree.insert("", tk.END, iid=name, values=(name, register.text, text))
+                tree.pack(fill=tk.X, pady=(5, 0))
+
+    def remove_selected_registers(self):
+        """删除选中的寄存器，依赖它们的寄存器变为无法计算"""
+        for name in self.register_tree.selection():
+            changed = self.workspace.remove(name)
+            self.update_register_display([name, *changed])
+
+    def on_register_double_click(self, event):
+        """双击寄存器行时把寄存器的值载入输入"""
+        name = self.register_tree.identify_row(event.y)
+        value = self.workspace.value(name) if name else None
+        if value is None:
+            return
+        self.current_value_set(self.format_number(value, self.base_var.get()))
+        self.update_displays()
 
     def calculate(self, add_to_history=True):
         """执行计算"""
@@ -985,23 +1571,12 @@ class BinaryCalculator:
             if add_to_history and input_text != "0" and input_text != "":
                 self.append_history(input_text)
 
-            result = self.parse_expression(input_text)
+            result = self.parse_expression(input_text, commit=add_to_history)
             if result is None:
                 return
 
-            # 如果结果是浮点数，不进行位运算和截断
-            if isinstance(result, float):
-                pass  # 保留浮点数原样
-            else:
-                # 根据位大小截断结果
-                bit_size = self.bit_size_var.get()
-                max_value = (1 << bit_size) - 1
-                if result > max_value:
-                    result = result & max_value
-                elif result < 0:
-                    # 对于负数，使用补码表示
-                    result = (1 << bit_size) + result
-                    result = result & max_value
+            # 根据位大小截断结果，负数使用补码表示；浮点数保留原样
+            result = truncate(result, self.bit_size_var.get())
 
             # 更新当前值
             self.current_value_set(self.format_number(result, base))
@@ -1030,9 +1605,7 @@ class BinaryCalculator:
         max_value = (1 << bit_size) - 1
         result = result & max_value
 
-        base = self.base_var.get()
-        self.current_value_set(self.format_number(result, base))
-        self.update_displays()
+        self.set_edited_value(value, result)
 
     def endian_convert(self):
         self.little_endian_var.set(not self.little_endian_var.get())
@@ -1046,11 +1619,46 @@ class BinaryCalculator:
         # 按位取反并根据位大小截断
         result = (~value) & ((1 << bit_size) - 1)
 
+        self.set_edited_value(value, result)
+
+    def set_edited_value(self, value, result, endian=False):
+        """显示位操作的结果，并以异或差值记录一个撤销步骤"""
         base = self.base_var.get()
+        self.undo_history.record(value, result, self.bit_size_var.get(), base, endian)
         self.current_value_set(self.format_number(result, base))
         self.update_displays()
 
+    def undo(self, event=None):
+        """撤销最近一次位操作；数值已被其他方式修改时撤销记录失效"""
+        self.restore_step(self.undo_history.undo(self.get_current_value()))
+
+    def redo(self, event=None):
+        """重做最近撤销的位操作"""
+        self.restore_step(self.undo_history.redo(self.get_current_value()))
+
+    def restore_step(self, restored):
+        if restored is None:
+            self.root.bell()
+            return
+        value, step = restored
+        # 恢复步骤记录的位大小和进制；端序转换的步骤同时切换端序选项
+        self.bit_size_var.set(step.bit_size)
+        self.base_var.set(step.base)
+        if step.endian:
+            self.little_endian_var.set(not self.little_endian_var.get())
+            self.pre_endian_var = self.little_endian_var.get()
+        self.current_value_set(self.format_number(value, step.base))
+        self.update_displays()
+
 if __name__ == "__main__":
+    # --profile-startup: 输出启动各阶段耗时后退出
+    profiler = StartupProfiler() if "--profile-startup" in sys.argv[1:] else None
+    if profiler:
+        profiler.mark("导入模块")
     root = tk.Tk()
-    app = BinaryCalculator(root)
+    if profiler:
+        profiler.mark("创建根窗口")
+    app = BinaryCalculator(root, profiler)
+    if profiler:
+        profiler.mark("创建界面控件")
     root.mainloop()
\ No newline at end of file
@@ -0,0 +1,143 @@
+import decimal
+from functools import lru_cache
+
+# 低于该位数/长度时直接使用内置的str/int：速度足够快，也不会超过Python 3.11起的
+# int_max_str_digits限制（默认4300位十进制数字）
+_BUILTIN_BIT_LIMIT = 8000
+_BUILTIN_DIGIT_LIMIT = 2000
+
+_DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+
+def _is_power_of_two(base):
+    return base & (base - 1) == 0
+
+
+def _int_to_decimal(n):
+    """将非负整数转换为decimal.Decimal：按二进制位分治，合并时使用libmpdec的快速乘法"""
+    D = decimal.Decimal
+    bit_limit = 128
+    powers = {}
+
+    def pow2(w):
+        """2**w 的Decimal值，带缓存"""
+        result = powers.get(w)
+        if result is None:
+            if w <= bit_limit:
+                result = D(2) ** w
+            elif w - 1 in powers:
+                result = powers[w - 1] * 2
+            else:
+                half = w >> 1
+                result = pow2(half) * pow2(w - half)
+            powers[w] = result
+        return result
+
+    def inner(n, w):
+        if w <= bit_limit:
+            return D(n)
+        half = w >> 1
+        hi = n >> half
+        lo = n - (hi << half)
+        return inner(lo, half) + inner(hi, w - half) * pow2(half)
+
+    with decimal.localcontext() as ctx:
+        ctx.prec = decimal.MAX_PREC
+        ctx.Emax = decimal.MAX_EMAX
+        ctx.Emin = decimal.MIN_EMIN
+        ctx.traps[decimal.Inexact] = 1
+        return inner(n, n.bit_length())
+
+
+def _int_to_base_dc(n, base):
+    """非2的幂进制的分治转换：按base**k拆分，低位部分补齐前导0"""
+    powers = {}
+
+    def pow_base(k):
+        result = powers.get(k)
+        if result is None:
+            result = powers[k] = base ** k
+        return result
+
+    def small(n):
+        digits = []
+        while n:
+            n, d = divmod(n, base)
+            digits.append(_DIGITS[d])
+        return "".join(reversed(digits)) or "0"
+
+    def inner(n, k):
+        """返回n的base进制表示，k为位数上限（2的幂）"""
+        if k <= 64:
+            return small(n)
+        half = k >> 1
+        hi, lo = divmod(n, pow_base(half))
+        if not hi:
+            return inner(lo, half)
+        return inner(hi, half) + inner(lo, half).rjust(half, "0")
+
+    k = 64
+    while pow_base(k) <= n:
+        k <<= 1
+    return inner(n, k)
+
+
+@lru_cache(maxsize=16)
+def int_to_str(value, base=10):
+    """将整数转换为base进制字符串（不带前缀、小写），超大数值使用分治算法，结果按值缓存"""
+    if value < 0:
+        return "-" + int_to_str(-value, base)
+    if base == 2:
+        return format(value, "b")
+    if base == 8:
+        return format(value, "o")
+    if base == 16:
+        return format(value, "x")
+    if base == 10:
+        if value.bit_length() < _BUILTIN_BIT_LIMIT:
+            return str(value)
+        return str(_int_to_decimal(value))
+    if not 2 <= base <= 36:
+        raise ValueError(f"不支持的进制: {base}")
+    return _int_to_base_dc(value, base)
+
+
+def _str_to_int_dc(digits, base):
+    """分治解析不带符号、前缀和下划线的数字串：int(高位) * base**len(低位) + int(低位)"""
+    powers = {}
+
+    def pow_base(k):
+        result = powers.get(k)
+        if result is None:
+            result = powers[k] = base ** k
+        return result
+
+    def inner(a, b):
+        if b - a <= _BUILTIN_DIGIT_LIMIT:
+            return int(digits[a:b], base)
+        mid = (a + b + 1) >> 1
+        return inner(a, mid) * pow_base(b - mid) + inner(mid, b)
+
+    return inner(0, len(digits))
+
+
+_PREFIXES = {2: "0b", 8: "0o", 16: "0x"}
+
+
+@lru_cache(maxsize=16)
+def parse_int(text, base=10):
+    """与int(text, base)相同的规则解析整数，超长的十进制等非2的幂进制输入使用分治算法"""
+    if len(text) <= _BUILTIN_DIGIT_LIMIT or _is_power_of_two(base):
+        return int(text, base)
+
+    digits = text.strip()
+    sign = 1
+    if digits[:1] in ("+", "-"):
+        sign = -1 if digits[0] == "-" else 1
+        digits = digits[1:]
+    prefix = _PREFIXES.get(base)
+    if prefix and digits[:2].lower() == prefix:
+        digits = digits[2:].lstrip("_")
+    if not digits or digits.startswith("_") or digits.endswith("_") or "__" in digits:
+        raise ValueError(f"invalid literal for int() with base {base}: {text[:50]!r}...")
+    return sign * _str_to_int_dc(digits.replace("_", ""), base)
@@ -0,0 +1,402 @@
+import argparse
+import array
+import io
+import itertools
+import sys
+from collections import deque
+
+from bitwise_convert import int_to_str, parse_int
+from bitwise_expr import ExpressionCache, compile_template
+
+BASE_PREFIXES = {'0x': 16, '0b': 2, '0o': 8}
+
+BASE_NAMES = {'bin': 2, 'oct': 8, 'dec': 10, 'hex': 16}
+
+# 输入中出现这些字符时作为表达式计算，否则作为单个数值解析（与界面输入框的规则相同）
+EXPRESSION_CHARS = '+-*/&|^=('
+
+
+def format_number(value, base):
+    """根据进制格式化数字，支持整数和浮点数"""
+    # 如果是浮点数，只支持十进制格式化
+    if isinstance(value, float):
+        # 检查是否是整数形式的浮点数
+        if value.is_integer():
+            return str(int(value))
+
+        # 处理浮点数精度问题，对于小数结果进行适当的四舍五入
+        # 尝试检测并修复常见的精度问题，如0.1+0.2=0.30000000000000004
+        # 先尝试格式化为15位有效数字
+        rounded_value = round(value, 15)
+        # 然后检查是否可以用更少的小数位表示
+        for i in range(15, 0, -1):
+            test_value = round(value, i)
+            if abs(test_value - value) < 1e-10:
+                rounded_value = test_value
+                break
+
+        # 转换为字符串并移除末尾的0
+        str_value = str(rounded_value)
+        # 检查是否有小数点，并且小数点后只有0
+        if '.' in str_value:
+            # 移除末尾的0
+            str_value = str_value.rstrip('0')
+            # 如果小数点后没有数字，移除小数点
+            if str_value.endswith('.'):
+                str_value = str_value[:-1]
+
+        return str_value
+
+    # 整数的格式化
+    if base == 2:
+        return bin(value)
+    elif base == 8:
+        return oct(value)
+    elif base == 10:
+        return int_to_str(value, 10)
+    elif base == 16:
+        return '0x' + hex(value)[2:].upper()
+
+
+def truncate(value, bit_size):
+    """根据位大小截断结果，负数使用补码表示；浮点数原样返回"""
+    if isinstance(value, float):
+        return value
+    max_value = (1 << bit_size) - 1
+    if value > max_value:
+        value = value & max_value
+    elif value < 0:
+        # 对于负数，使用补码表示
+        value = (1 << bit_size) + value
+        value = value & max_value
+    return value
+
+
+def literal_base(text, default_base):
+    """根据常见的进制前缀识别数值的进制，没有前缀时使用默认进制"""
+    return BASE_PREFIXES.get(text.replace('_', '')[:2].lower(), default_base)
+
+
+# array模块中各字节宽度对应的无符号类型码（类型宽度与平台相关，按实际itemsize查找）
+_ARRAY_TYPECODES = {array.array(code).itemsize: code for code in 'QLIHB'}
+
+
+def _swap_units(data, unit):
+    """在每个unit字节的单元内翻转字节顺序，单元之间的顺序不变"""
+    if unit == 1:
+        return data
+    if unit == len(data):
+        return data[::-1]
+    code = _ARRAY_TYPECODES.get(unit)
+    if code is not None:
+        words = array.array(code, data)
+        words.byteswap()
+        return words.tobytes()
+    # 没有对应数组类型的单元（如3、6字节）逐个切片翻转；memoryview的反向切片不连续，不能直接拼接
+    return b''.join(data[i:i + unit][::-1] for i in range(0, len(data), unit))
+
+
+def _swap_layout(bit_size, word_bits):
+    """返回(每个值的字节数, 翻转单元的字节数)，字节数按翻转单元向上对齐"""
+    nbytes = (bit_size + 7) // 8
+    if word_bits is None:
+        return nbytes, nbytes
+    if word_bits % 8:
+        raise ValueError(f"字宽必须是8的倍数: {word_bits}")
+    unit = word_bits // 8
+    nbytes = (nbytes + unit - 1) // unit * unit
+    return nbytes, unit
+
+
+def byteswap(value, bit_size, word_bits=None):
+    """端序转换：word_bits为None时翻转整个值的字节序，
+    否则在每个word_bits位的字内翻转字节序，字之间的位置保持不变
+
+    负数无法转换为字节，抛出OverflowError。
+    """
+    nbytes, unit = _swap_layout(bit_size, word_bits)
+    data = value.to_bytes(nbytes, byteorder='big')
+    return int.from_bytes(_swap_units(data, unit), byteorder='big')
+
+
+def byteswap_many(values, bit_size, word_bits=None):
+    """批量端序转换：所有值拼接到一个缓冲区中一次完成翻转"""
+    nbytes, unit = _swap_layout(bit_size, word_bits)
+    data = b''.join(value.to_bytes(nbytes, byteorder='big') for value in values)
+    if unit == nbytes:
+        # 整体翻转缓冲区后每个值的字节序已翻转，但值的顺序也被颠倒
+        swapped = memoryview(data[::-1])
+        return [int.from_bytes(swapped[i - nbytes:i], byteorder='big')
+                for i in range(len(data), 0, -nbytes)]
+    swapped = memoryview(_swap_units(data, unit))
+    return [int.from_bytes(swapped[i:i + nbytes], byteorder='big')
+            for i in range(0, len(data), nbytes)]
+
+
+def selection_runs(selected_bits):
+    """将选中的位拆分为连续区间，返回[(起始位, 宽度, 在结果中的偏移), ...]
+
+    与位选择结果的规则一致：按位索引升序，第k个选中位成为结果的第k位。
+    """
+    runs = []
+    dest = 0
+    for bit in sorted(set(selected_bits)):
+        if bit < 0:
+            raise ValueError(f"位索引不能为负数: {bit}")
+        if runs and runs[-1][0] + runs[-1][1] == bit:
+            lo, width, offset = runs[-1]
+            runs[-1] = (lo, width + 1, offset)
+        else:
+            runs.append((bit, 1, dest))
+        dest += 1
+    return runs
+
+
+def gather_bits(value, runs):
+    """按selection_runs生成的计划提取选中的位并紧凑打包"""
+    if len(runs) == 1:
+        # 连续选择的快速路径
+        lo, width, _ = runs[0]
+        return (value >> lo) & ((1 << width) - 1)
+    result = 0
+    for lo, width, dest in runs:
+        result |= ((value >> lo) & ((1 << width) - 1)) << dest
+    return result
+
+
+def selection_mask(selected_bits):
+    """位画布上选中的位对应的掩码；先写入字节数组再一次转换，耗时与选中的位数成线性关系"""
+    if not selected_bits:
+        return 0
+    buf = bytearray((max(selected_bits) >> 3) + 1)
+    for bit in selected_bits:
+        buf[bit >> 3] |= 1 << (bit & 7)
+    return int.from_bytes(buf, 'little')
+
+
+class Engine:
+    """无界面的计算引擎：与BinaryCalculator使用相同的表达式解析、截断和补码规则"""
+
+    def __init__(self, bit_size=64, base=10, scientific_mode=False, cache=None, template=None):
+        self.bit_size = bit_size
+        self.base = base
+        self.scientific_mode = scientific_mode
+        self.cache = cache if cache is not None else ExpressionCache()
+        # 表达式模板：设置后每行输入为模板各变量的值，模板只编译一次
+        self.template = None
+        if template is not None:
+            self.template = compile_template(template, scientific_mode, bit_size)
+
+    def value(self, text):
+        """单个数值或表达式的值（未截断），输入无效时返回None
+
+        不含EXPRESSION_CHARS的输入按界面输入框的规则作为单个数值解析（识别0x/0b/0o前缀，否则使用self.base），
+        无法解析时（如 "1e3"、"12 34"）与界面一样视为无效，不再作为表达式计算；
+        其余输入按calculate的规则作为表达式计算；表达式不支持一元负号，因此 "-5" 与界面一样无效。
+        """
+        if any(op in text for op in EXPRESSION_CHARS):
+            return self.cache.evaluate(text, self.scientific_mode, self.bit_size)
+        try:
+            return parse_int(text, literal_base(text, self.base))
+        except ValueError:
+            return None
+
+    def evaluate(self, text):
+        """计算一行输入，输入无效时返回None"""
+        text = text.strip()
+        if self.template is not None:
+            return self.apply_template(text)
+        result = self.value(text)
+        if result is None:
+            return None
+        return truncate(result, self.bit_size)
+
+    def apply_template(self, text):
+        """以一行输入作为模板各变量的值（按变量首次出现的顺序，空白或逗号分隔）计算模板"""
+        values = [self.value(item) for item in text.replace(',', ' ').split()]
+        if len(values) != len(self.template.variables) or None in values:
+            return None
+        try:
+            return self.template.function(*values)
+        except Exception:
+            return None
+
+
+def parse_bases(text):
+    """解析输出进制列表，例如 "hex,dec" 或 "16,10" """
+    bases = []
+    for item in text.split(','):
+        item = item.strip().lower()
+        base = BASE_NAMES.get(item)
+        if base is None:
+            try:
+                base = int(item)
+            except ValueError:
+                base = None
+        if base not in BASE_NAMES.values():
+            raise argparse.ArgumentTypeError(f"不支持的进制: {item}")
+        bases.append(base)
+    return bases
+
+
+def positive_int(text):
+    """解析正整数参数，用于进程数和数据块行数"""
+    try:
+        value = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"无效的整数: {text}")
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"必须为正整数: {text}")
+    return value
+
+
+def iter_lines(paths):
+    """逐行读取输入文件，'-' 或未指定文件时读取标准输入；不会把整个文件读入内存"""
+    if not paths:
+        paths = ['-']
+    for path in paths:
+        if path == '-':
+            yield from sys.stdin
+        else:
+            with open(path, 'r', encoding='utf-8') as f:
+                yield from f
+
+
+def format_result(expression, value, bases, echo=False, error_text="ERROR", separator='\t'):
+    """格式化一行输出，无效输入输出error_text"""
+    if value is None:
+        fields = [error_text]
+    else:
+        fields = [format_number(value, base) for base in bases]
+    if echo:
+        fields.insert(0, expression)
+    return separator.join(fields) + '\n'
+
+
+def run_batch(lines, out, engine, bases, echo=False, error_text="ERROR"):
+    """流式计算每一行输入并写出结果，空行原样输出以保持行对齐，返回(处理行数, 错误行数)"""
+    count = errors = 0
+    evaluate = engine.evaluate
+    write = out.write
+    for line in lines:
+        count += 1
+        expression = line.strip()
+        if not expression:
+            write('\n')
+            continue
+        value = evaluate(expression)
+        if value is None:
+            errors += 1
+        write(format_result(expression, value, bases, echo, error_text))
+    return count, errors
+
+
+# 工作进程内的计算引擎，由_init_worker创建，进程内所有数据块共用同一个表达式缓存
+_worker_engine = None
+
+
+def _init_worker(bit_size, base, scientific_mode, template):
+    global _worker_engine
+    _worker_engine = Engine(bit_size=bit_size, base=base, scientific_mode=scientific_mode, template=template)
+
+
+def _evaluate_chunk(lines, bases, echo, error_text):
+    """在工作进程中计算一个数据块，返回(输出文本, 处理行数, 错误行数)"""
+    out = io.StringIO()
+    count, errors = run_batch(lines, out, _worker_engine, bases, echo, error_text)
+    return out.getvalue(), count, errors
+
+
+def iter_chunks(lines, chunk_size):
+    """将输入按chunk_size行切分为数据块；chunk_size小于1时抛出ValueError"""
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size必须为正整数: {chunk_size}")
+    lines = iter(lines)
+    while True:
+        chunk = list(itertools.islice(lines, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def run_parallel_batch(lines, out, engine, bases, echo=False, error_text="ERROR",
+                       jobs=2, chunk_size=10000):
+    """将输入切分为数据块在进程池中计算，按输入顺序写出结果，返回(处理行数, 错误行数)
+
+    同时在途的数据块数量限制为jobs的两倍，内存占用与输入大小无关。
+    """
+    # 进程池依赖multiprocessing，导入较慢，只在需要时导入以免拖慢界面启动
+    from concurrent.futures import ProcessPoolExecutor
+
+    count = errors = 0
+    pending = deque()
+    max_pending = jobs * 2
+
+    def write_oldest():
+        nonlocal count, errors
+        text, chunk_count, chunk_errors = pending.popleft().result()
+        out.write(text)
+        count += chunk_count
+        errors += chunk_errors
+
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(engine.bit_size, engine.base, engine.scientific_mode,
+                                       engine.template and engine.template.text)) as pool:
+        for chunk in iter_chunks(lines, chunk_size):
+            if len(pending) >= max_pending:
+                write_oldest()
+            pending.append(pool.submit(_evaluate_chunk, chunk, bases, echo, error_text))
+        while pending:
+            write_oldest()
+    return count, errors
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description="批量计算表达式：从文件或标准输入逐行读取，按指定进制输出结果")
+    parser.add_argument("files", nargs="*", help="输入文件，'-' 表示标准输入（默认）")
+    parser.add_argument("-b", "--bits", type=int, default=64, help="位大小，结果按此截断（默认64）")
+    parser.add_argument("-i", "--input-base", type=int, choices=[2, 8, 10, 16], default=10,
+                        help="不带前缀的单个数值的进制（默认10）")
+    parser.add_argument("-o", "--output-bases", type=parse_bases, default=[16],
+                        help="输出进制，逗号分隔，如 hex,dec 或 16,10（默认hex）")
+    parser.add_argument("-s", "--scientific", action="store_true", help="科学计算模式：/ 为浮点除法，^ 为次方")
+    parser.add_argument("-t", "--template",
+                        help="表达式模板，如 \"(x >> 12) & 0x3FF\"：每行输入为模板中各变量的值，"
+                             "按变量首次出现的顺序，空白或逗号分隔")
+    parser.add_argument("-e", "--echo", action="store_true", help="在结果前输出原表达式")
+    parser.add_argument("--error-text", default="ERROR", help="无效表达式的输出内容（默认ERROR）")
+    parser.add_argument("--output", help="输出文件（默认标准输出）")
+    parser.add_argument("-j", "--jobs", type=positive_int, default=1, help="并行计算的进程数（默认1，不使用进程池）")
+    parser.add_argument("--chunk-size", type=positive_int, default=10000, help="并行计算时每个数据块的行数（默认10000）")
+    return parser
+
+
+def main(argv=None):
+    parser = build_arg_parser()
+    args = parser.parse_args(argv)
+    try:
+        engine = Engine(bit_size=args.bits, base=args.input_base, scientific_mode=args.scientific,
+                        template=args.template)
+    except ValueError as e:
+        parser.error(f"无效的表达式模板: {e}")
+
+    out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        if args.jobs > 1:
+            count, errors = run_parallel_batch(iter_lines(args.files), out, engine, args.output_bases,
+                                               args.echo, args.error_text, args.jobs, args.chunk_size)
+        else:
+            count, errors = run_batch(iter_lines(args.files), out, engine, args.output_bases,
+                                      args.echo, args.error_text)
+    finally:
+        if args.output:
+            out.close()
+
+    if errors:
+        print(f"{errors}/{count} 行计算失败", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
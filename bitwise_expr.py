@@ -0,0 +1,546 @@
+import operator
+import os
+from collections import OrderedDict
+
+from bitwise_convert import parse_int
+from bitwise_intrinsics import FUNCTIONS, bind
+
+
+def _lex(expr, scientific_mode, i=0, names=False):
+    """简单的词法分析器：从位置i开始逐个产生(标记, 标记结束位置)
+
+    字母或下划线开头的标识符只能是内置函数名（如popcount）；
+    names为True时还识别变量名，用于编译带自由变量的表达式模板。
+    """
+    while i < len(expr):
+        char = expr[i]
+        if char.isspace():
+            i += 1
+        elif char == '0' and i + 1 < len(expr) and expr[i+1].lower() in ['x', 'b', 'd']:
+            # 处理以0x、0b或0d开头的数字
+            start = i
+            i += 2  # 跳过0和x/b
+            while i < len(expr) and (expr[i].isalnum() or expr[i] == '_'):
+                i += 1
+            yield ('NUMBER', expr[start:i]), i
+        elif char.isdigit() or (char == '.' and scientific_mode):
+            # 解析数字（在科学计算模式下支持小数）
+            start = i
+            has_decimal = False
+            has_exponent = False
+            if char == '.' and scientific_mode:
+                has_decimal = True
+                i += 1
+            # 收集数字部分
+            while i < len(expr):
+                if expr[i].isdigit() or expr[i] == '_':
+                    i += 1
+                elif expr[i] == '.' and not has_decimal and scientific_mode:
+                    has_decimal = True
+                    i += 1
+                elif (expr[i].lower() == 'e' and i+1 < len(expr) and
+                      (expr[i+1].isdigit() or expr[i+1] in ['+', '-'])) and not has_exponent:
+                    has_exponent = True
+                    i += 1
+                    # 处理指数部分的符号
+                    if i < len(expr) and expr[i] in ['+', '-']:
+                        i += 1
+                else:
+                    break
+            # 确保我们已经收集了完整的数字
+            while i < len(expr) and expr[i].isdigit():
+                i += 1
+            yield ('NUMBER', expr[start:i]), i
+        elif char.isalpha() or char == '_':
+            start = i
+            while i < len(expr) and (expr[i].isalnum() or expr[i] == '_'):
+                i += 1
+            if not names and expr[start:i] not in FUNCTIONS:
+                raise ValueError(f"Invalid character in expression: {char}")
+            yield ('NAME', expr[start:i]), i
+        elif char in '+-*/&|^()<<>>,':
+            # 解析运算符和括号
+            if char == '<' and i+1 < len(expr) and expr[i+1] == '<':
+                i += 2
+                yield ('OPERATOR', '<<'), i
+            elif char == '>' and i+1 < len(expr) and expr[i+1] == '>':
+                i += 2
+                yield ('OPERATOR', '>>'), i
+            else:
+                i += 1
+                yield ('OPERATOR', char), i
+        else:
+            # 检查是否是单独的'0b'、'0x'或'0d'
+            if i + 1 < len(expr) and expr[i:i+2].lower() in ['0b', '0x', '0d']:
+                i += 2
+                yield ('NUMBER', expr[i-2:i]), i
+            else:
+                raise ValueError(f"Invalid character in expression: {char}")
+
+
+def tokenize(expr, scientific_mode=False, names=False):
+    """将表达式分解为标记列表"""
+    return [token for token, _ in _lex(expr, scientific_mode, names=names)]
+
+
+def parse_number(num_str):
+    """处理不同进制的数字"""
+    num_str = num_str.lower()
+
+    # 特殊处理：单独的0b或0x作为十进制0处理
+    if num_str == '0b' or num_str == '0x' or num_str == '0d':
+        return 0
+
+    if num_str.startswith('0x'):
+        try:
+            return int(num_str, 16)
+        except ValueError:
+            # 如果无法解析为十六进制，则作为十进制0处理
+            return 0
+    elif num_str.startswith('0b'):
+        try:
+            return int(num_str, 2)
+        except ValueError:
+            # 如果无法解析为二进制，则作为十进制0处理
+            return 0
+    elif num_str.startswith('0d'):
+        try:
+            # 0d前缀表示十进制
+            return parse_int(num_str[2:].replace('_', ''))
+        except ValueError:
+            # 如果无法解析为十进制，则作为十进制0处理
+            return 0
+    else:
+        # 尝试转换为十进制（包括科学记数法）
+        try:
+            # 直接使用float转换，它能处理科学记数法
+            float_val = float(num_str.replace('_', ''))
+            # 如果是整数形式的浮点数但不是科学记数法，返回整数
+            if float_val.is_integer() and 'e' not in num_str:
+                return int(float_val)
+            return float_val
+        except ValueError:
+            # 可能是十六进制但没有前缀
+            try:
+                return int(num_str.replace('_', ''), 16)
+            except ValueError:
+                raise ValueError(f"Invalid number format: {num_str}")
+
+
+class _Parser:
+    """递归下降解析器，生成语法树
+
+    语法树节点：
+        ('num', 值)
+        ('var', 变量名)
+        ('call', 函数名, (参数, ...))
+        ('chain', 首个操作数, ((运算符, 操作数), ...))  同一优先级的左结合运算链
+    """
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.i = 0
+
+    def parse_chain(self, operators, parse_operand):
+        first = parse_operand()
+        rest = []
+        tokens = self.tokens
+        while self.i < len(tokens) and tokens[self.i][1] in operators:
+            op = tokens[self.i][1]
+            self.i += 1
+            rest.append((op, parse_operand()))
+        if not rest:
+            return first
+        return ('chain', first, tuple(rest))
+
+    def parse_expression(self):  # 处理加减法
+        return self.parse_chain(('+', '-'), self.parse_term)
+
+    def parse_term(self):  # 处理乘除法
+        return self.parse_chain(('*', '/'), self.parse_factor)
+
+    def parse_factor(self):  # 处理位运算和括号
+        return self.parse_chain(('&', '|', '^', '<<', '>>'), self.parse_atom)
+
+    def parse_atom(self):
+        if self.i >= len(self.tokens):
+            raise ValueError("Unexpected end of expression")
+        token = self.tokens[self.i]
+        self.i += 1
+        if token[0] == 'NUMBER':
+            return ('num', parse_number(token[1]))
+        elif token[0] == 'NAME':
+            if self.i < len(self.tokens) and self.tokens[self.i][1] == '(':
+                self.i += 1
+                return ('call', token[1], self.parse_arguments())
+            return ('var', token[1])
+        elif token[1] == '(':
+            expr_val = self.parse_expression()
+            # 确保右括号存在
+            if self.i >= len(self.tokens) or self.tokens[self.i][1] != ')':
+                raise ValueError("Missing closing parenthesis")
+            self.i += 1
+            return expr_val
+        else:
+            raise ValueError(f"Unexpected token: {token}")
+
+    def parse_arguments(self):
+        """解析函数调用的参数列表，左括号已经读取"""
+        args = []
+        tokens = self.tokens
+        if self.i < len(tokens) and tokens[self.i][1] == ')':
+            self.i += 1
+            return ()
+        while True:
+            args.append(self.parse_expression())
+            if self.i >= len(tokens):
+                raise ValueError("Missing closing parenthesis")
+            token = tokens[self.i]
+            self.i += 1
+            if token[1] == ')':
+                return tuple(args)
+            if token[1] != ',':
+                raise ValueError(f"Unexpected token: {token}")
+
+
+def parse(tokens):
+    """将标记列表解析为语法树；完整的表达式之后还有多余的标记时抛出ValueError
+
+    逗号只能出现在函数调用的参数之间，其他位置的逗号（如 "1,000"）同样作为多余的标记被拒绝。
+    """
+    parser = _Parser(tokens)
+    tree = parser.parse_expression()
+    if parser.i < len(tokens):
+        raise ValueError(f"Unexpected token: {tokens[parser.i]}")
+    return tree
+
+
+def binary_operators(scientific_mode):
+    """返回运算符到实现函数的映射"""
+    return {
+        '+': operator.add,
+        '-': operator.sub,
+        '*': operator.mul,
+        # 在科学计算模式下使用浮点数除法，否则使用整数除法
+        '/': operator.truediv if scientific_mode else operator.floordiv,
+        '&': operator.and_,
+        '|': operator.or_,
+        # 科学计算模式下，^ 作为次方操作；普通模式下，^ 作为异或操作
+        '^': operator.pow if scientific_mode else operator.xor,
+        '<<': operator.lshift,
+        '>>': operator.rshift,
+    }
+
+
+def _build(node, ops, bit_size):
+    """将语法树节点转换为求值闭包，位大小相关的内置函数默认使用bit_size"""
+    kind = node[0]
+    if kind == 'num':
+        value = node[1]
+        return lambda: value
+    if kind == 'var':
+        raise ValueError(f"Unknown variable: {node[1]}")
+    if kind == 'call':
+        func = bind(node[1], len(node[2]), bit_size)
+        args = tuple(_build(arg, ops, bit_size) for arg in node[2])
+        if len(args) == 1:
+            arg, = args
+            return lambda: func(arg())
+        return lambda: func(*[arg() for arg in args])
+
+    first = _build(node[1], ops, bit_size)
+    rest = tuple((ops[op], _build(operand, ops, bit_size)) for op, operand in node[2])
+    if len(rest) == 1:
+        (op, second), = rest
+        return lambda: op(first(), second())
+
+    def chain():
+        value = first()
+        for op, operand in rest:
+            value = op(value, operand())
+        return value
+    return chain
+
+
+class CompiledExpression:
+    """编译后的表达式：保存语法树和求值闭包，可重复求值而无需重新词法和语法分析"""
+
+    __slots__ = ('text', 'scientific_mode', 'bit_size', 'tree', '_evaluate')
+
+    def __init__(self, text, scientific_mode, tree, bit_size=64):
+        self.text = text
+        self.scientific_mode = scientific_mode
+        self.bit_size = bit_size
+        self.tree = tree
+        self._evaluate = _build(tree, binary_operators(scientific_mode), bit_size)
+
+    def evaluate(self):
+        return self._evaluate()
+
+
+def compile_expression(expression, scientific_mode=False, bit_size=64):
+    """编译表达式，语法错误时抛出ValueError"""
+    return CompiledExpression(expression, scientific_mode, parse(tokenize(expression, scientific_mode)), bit_size)
+
+
+def operator_sources(scientific_mode):
+    """返回运算符到Python源码运算符的映射，语义与binary_operators一致"""
+    return {
+        '+': '+', '-': '-', '*': '*',
+        '/': '/' if scientific_mode else '//',
+        '&': '&', '|': '|',
+        '^': '**' if scientific_mode else '^',
+        '<<': '<<', '>>': '>>',
+    }
+
+
+def fold_constants(node, ops, bit_size=64):
+    """常量折叠：不含变量的子树直接求值；运算链从左到右折叠连续的常量前缀
+
+    计算出错（如除以0）的部分保持原样，错误在调用时才出现，与逐次求值的行为一致。
+    """
+    kind = node[0]
+    if kind == 'call':
+        args = tuple(fold_constants(arg, ops, bit_size) for arg in node[2])
+        if all(arg[0] == 'num' for arg in args):
+            func = bind(node[1], len(args), bit_size)
+            try:
+                return ('num', func(*[arg[1] for arg in args]))
+            except Exception:
+                pass
+        return ('call', node[1], args)
+    if kind != 'chain':
+        return node
+    first = fold_constants(node[1], ops, bit_size)
+    rest = []
+    for op, operand in node[2]:
+        operand = fold_constants(operand, ops, bit_size)
+        if not rest and first[0] == 'num' and operand[0] == 'num':
+            try:
+                first = ('num', ops[op](first[1], operand[1]))
+                continue
+            except Exception:
+                pass
+        rest.append((op, operand))
+    if not rest:
+        return first
+    return ('chain', first, tuple(rest))
+
+
+def free_variables(node):
+    """按首次出现的顺序返回语法树中的变量名"""
+    names = []
+
+    def visit(node):
+        if node[0] == 'var':
+            if node[1] not in names:
+                names.append(node[1])
+        elif node[0] == 'call':
+            for arg in node[2]:
+                visit(arg)
+        elif node[0] == 'chain':
+            visit(node[1])
+            for _, operand in node[2]:
+                visit(operand)
+    visit(node)
+    return names
+
+
+class Template:
+    """编译后的表达式模板：自由变量作为参数，整个表达式生成为一个Python函数
+
+    例如 "(x >> 12) & 0x3FF" 编译为 lambda _a0: ((_a0 >> 12) & 1023)，
+    调用时不再经过词法分析、语法分析和闭包树，适合对大量数值套用同一个公式。
+    bit_size不为None时，结果按calculate的规则截断为bit_size位（负数使用补码），
+    位大小相关的内置函数也默认使用bit_size（为None时使用64）。
+    """
+
+    __slots__ = ('text', 'scientific_mode', 'bit_size', 'variables', 'source', 'function', 'raw')
+
+    def __init__(self, text, scientific_mode=False, bit_size=None, variables=None):
+        tree = parse(tokenize(text, scientific_mode, names=True))
+
+        names = free_variables(tree)
+        if variables is None:
+            variables = names
+        unknown = [name for name in names if name not in variables]
+        if unknown:
+            raise ValueError(f"Unknown variable: {', '.join(unknown)}")
+
+        self.text = text
+        self.scientific_mode = scientific_mode
+        self.bit_size = bit_size
+        self.variables = tuple(variables)
+
+        namespace = {}
+        args = {name: f"_a{i}" for i, name in enumerate(self.variables)}
+        width = bit_size or 64
+        body = self._source(fold_constants(tree, binary_operators(scientific_mode), width),
+                            operator_sources(scientific_mode), args, namespace, width)
+        params = ", ".join(args.values())
+        self.raw = eval(compile(f"lambda {params}: {body}", f"<template {text}>", "eval"), namespace)
+
+        if bit_size is None:
+            self.source = f"lambda {params}: {body}"
+        elif scientific_mode:
+            # 科学计算模式下结果可能是浮点数，浮点数不截断
+            mask = (1 << bit_size) - 1
+            namespace['_mask'] = lambda v: v if isinstance(v, float) else v & mask
+            self.source = f"lambda {params}: _mask({body})"
+        else:
+            self.source = f"lambda {params}: ({body}) & {(1 << bit_size) - 1:#x}"
+        self.function = eval(compile(self.source, f"<template {text}>", "eval"), namespace)
+
+    @staticmethod
+    def _source(node, ops, args, namespace, width):
+        """生成语法树对应的Python表达式源码，每个运算都加括号以保持原有的优先级"""
+        kind = node[0]
+        if kind == 'var':
+            return args[node[1]]
+        if kind == 'call':
+            # 内置函数放入命名空间，省略的位大小参数直接写入调用
+            bind(node[1], len(node[2]), width)  # 检查函数名和参数个数
+            func, arity = FUNCTIONS[node[1]]
+            name = f"_f_{node[1]}"
+            namespace[name] = func
+            sources = [Template._source(arg, ops, args, namespace, width) for arg in node[2]]
+            if len(sources) == arity:
+                sources.append(str(width))
+            return f"{name}({', '.join(sources)})"
+        if kind == 'num':
+            value = node[1]
+            if isinstance(value, int) and value.bit_length() <= 64:
+                # 负数加括号，避免 -2 ** x 被解释为 -(2 ** x)
+                return repr(value) if value >= 0 else f"({value!r})"
+            # 超大整数和inf等浮点数没有合适的字面量，作为常量放入命名空间
+            name = f"_k{len(namespace)}"
+            namespace[name] = value
+            return name
+
+        source = Template._source(node[1], ops, args, namespace, width)
+        for op, operand in node[2]:
+            source = f"({source} {ops[op]} {Template._source(operand, ops, args, namespace, width)})"
+        return source
+
+    def __call__(self, *values):
+        return self.function(*values)
+
+    def apply(self, *columns):
+        """对每组输入求值，每个参数为一个变量的取值序列
+
+        普通序列逐个调用并返回列表；参数中有NumPy数组时整体只调用一次，返回数组，
+        此时表达式中的常量需要能用数组的数据类型表示。
+        """
+        if not any(hasattr(column, 'dtype') for column in columns):
+            return list(map(self.function, *columns))
+        result = self.raw(*columns)
+        if self.bit_size is not None and self.bit_size < result.dtype.itemsize * 8:
+            result = result & result.dtype.type((1 << self.bit_size) - 1)
+        return result
+
+
+def compile_template(expression, scientific_mode=False, bit_size=None, variables=None):
+    """编译带自由变量的表达式模板，语法错误或变量不在variables中时抛出ValueError"""
+    return Template(expression, scientific_mode, bit_size, variables)
+
+
+class _PrefixLexer:
+    """记住上一次的词法分析结果，新表达式与其共享前缀时只分析前缀之后的部分"""
+
+    def __init__(self):
+        self.expr = None
+        self.scientific_mode = None
+        self.tokens = []
+        self.ends = []
+
+    def tokenize(self, expr, scientific_mode):
+        keep = 0
+        if self.expr is not None and scientific_mode == self.scientific_mode:
+            common = len(os.path.commonprefix([self.expr, expr]))
+            # 词法分析最多向标记结束位置之后看一个字符，
+            # 因此只有其后至少还有一个共同字符的标记才能复用
+            while keep < len(self.ends) and self.ends[keep] + 1 < common:
+                keep += 1
+
+        tokens = self.tokens[:keep]
+        ends = self.ends[:keep]
+        for token, end in _lex(expr, scientific_mode, ends[-1] if ends else 0):
+            tokens.append(token)
+            ends.append(end)
+
+        self.expr = expr
+        self.scientific_mode = scientific_mode
+        self.tokens = tokens
+        self.ends = ends
+        return tokens
+
+
+class ExpressionCache:
+    """表达式编译缓存：以(表达式文本, 科学计算模式, 位大小)为键的LRU缓存
+
+    无效表达式同样会被缓存（值为None），输入过程中反复出现的半截表达式也不必重新分析。
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lexer = _PrefixLexer()
+        self.hits = 0
+        self.misses = 0
+
+    def compile(self, expression, scientific_mode=False, bit_size=64):
+        """返回编译后的表达式，表达式无效时返回None"""
+        key = (expression, scientific_mode, bit_size)
+        entries = self.entries
+        try:
+            compiled = entries[key]
+        except KeyError:
+            pass
+        else:
+            self.hits += 1
+            entries.move_to_end(key)
+            return compiled
+
+        self.misses += 1
+        try:
+            tree = parse(self.lexer.tokenize(expression, scientific_mode))
+            compiled = CompiledExpression(expression, scientific_mode, tree, bit_size)
+        except Exception:
+            compiled = None
+
+        entries[key] = compiled
+        if len(entries) > self.maxsize:
+            entries.popitem(last=False)
+        return compiled
+
+    def evaluate(self, expression, scientific_mode=False, bit_size=64):
+        """计算表达式的值，表达式无效或计算出错时返回None"""
+        compiled = self.compile(expression, scientific_mode, bit_size)
+        if compiled is None:
+            return None
+        try:
+            return compiled.evaluate()
+        except Exception:
+            return None
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self.entries),
+            'maxsize': self.maxsize,
+        }
+
+    def clear(self):
+        self.entries.clear()
+        self.lexer = _PrefixLexer()
+        self.hits = 0
+        self.misses = 0
+
+
+default_cache = ExpressionCache()
+
+
+def evaluate(expression, scientific_mode=False, bit_size=64):
+    """使用共享缓存计算表达式，表达式无效或计算出错时返回None"""
+    return default_cache.evaluate(expression, scientific_mode, bit_size)
@@ -0,0 +1,60 @@
+import mmap
+import os
+
+
+class MappedFile:
+    """只读内存映射文件：按偏移读取任意位宽的数值窗口，文件内容不会整体读入内存
+
+    每次读取只复制窗口本身的字节，耗时与文件大小无关；
+    超出文件末尾的部分按0填充。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+        try:
+            self.size = os.fstat(self.file.fileno()).st_size
+            if self.size == 0:
+                raise ValueError(f"文件为空: {path}")
+            self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self.file.close()
+            raise
+
+    def close(self):
+        self.mm.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def read_bytes(self, offset, nbytes):
+        """读取从offset开始的nbytes字节，超出文件末尾的部分按0填充"""
+        if offset < 0:
+            raise ValueError(f"偏移不能为负数: {offset}")
+        data = self.mm[offset:offset + nbytes]
+        if len(data) < nbytes:
+            data += bytes(nbytes - len(data))
+        return data
+
+    def read_value(self, offset, bit_size, little_endian=True):
+        """按指定端序读取从offset开始、bit_size位宽的数值"""
+        nbytes = (bit_size + 7) // 8
+        value = int.from_bytes(self.read_bytes(offset, nbytes), 'little' if little_endian else 'big')
+        return value & ((1 << bit_size) - 1)
+
+    def clamp_offset(self, offset, nbytes):
+        """将窗口起始偏移限制在文件范围内"""
+        return max(0, min(offset, self.size - nbytes))
+
+    def prefetch(self, offset, length=mmap.PAGESIZE):
+        """提示操作系统预读offset开始的页面，平台不支持时忽略"""
+        if not hasattr(mmap, 'MADV_WILLNEED') or offset >= self.size:
+            return
+        start = max(offset, 0) // mmap.PAGESIZE * mmap.PAGESIZE
+        length = min(offset + length, self.size) - start
+        if length > 0:
+            self.mm.madvise(mmap.MADV_WILLNEED, start, length)
@@ -0,0 +1,188 @@
+import bisect
+import heapq
+import locale
+import math
+import os
+from collections import OrderedDict
+
+# 前缀查找的上界：前缀后接最大的码位
+_MAX_CHAR = chr(0x10FFFF)
+
+
+class HistoryStore:
+    """历史记录：启动时加载一次，在内存中维护有序索引，变更以追加日志的方式写入文件
+
+    文件格式与旧版本兼容：每行一条记录，按从旧到新的顺序排列。
+    追加写入会产生重复行，加载时按顺序重放即可去重，重复行同时累计使用频率；
+    日志行数超过上限的 compact_factor 倍时整体重写一次文件。
+
+    每条记录有一个综合使用频率和最近使用时间的分数（按使用次数指数衰减的频率），
+    第t次使用时 分数 = λt + log(1 + exp(旧分数 - λt))，λ = ln2 / half_life。
+    未被使用的记录分数不变，记录之间的相对顺序只在使用时改变，因此排序结果可以增量维护。
+    """
+
+    def __init__(self, path, max_num=100, compact_factor=4, half_life=1000, top_size=100, scan_limit=2000):
+        self.path = path
+        self.max_num = max_num
+        self.compact_factor = compact_factor
+        # 按最近使用从旧到新排列，键为记录内容，值为分数
+        self.entries = OrderedDict()
+        # 文件中的行数（包括已被覆盖的重复行）
+        self.journal_lines = 0
+        # 每次内容变化时递增，供界面判断是否需要刷新
+        self.version = 0
+        # 累计使用次数，作为分数的时间刻度
+        self.clock = 0
+        self.rate = math.log(2) / half_life
+        # 按 (小写内容, 内容) 排序的列表，用于二分查找前缀范围
+        self.sorted = []
+        # 匹配数超过scan_limit的前缀 -> 按分数从高到低的前top_size条记录，按最近查询淘汰
+        self.top_size = top_size
+        self.scan_limit = scan_limit
+        self.top = OrderedDict()
+        self.max_top = 64
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __contains__(self, value):
+        return value in self.entries
+
+    def newest_first(self):
+        """按从新到旧的顺序返回所有记录"""
+        return list(reversed(self.entries))
+
+    def search(self, query="", limit=50):
+        """返回以query开头（不区分大小写）的记录中分数最高的limit条，按分数从高到低排列
+
+        匹配数不超过scan_limit时直接在前缀范围内选出前limit条；
+        匹配数更多的短前缀使用缓存的排序结果，缓存随记录的使用和淘汰增量更新。
+        """
+        prefix = query.lower()
+        lo = bisect.bisect_left(self.sorted, (prefix,))
+        hi = bisect.bisect_left(self.sorted, (prefix + _MAX_CHAR,), lo)
+        if hi - lo <= self.scan_limit or limit > self.top_size:
+            return heapq.nlargest(limit, [value for _, value in self.sorted[lo:hi]], key=self.entries.__getitem__)
+
+        top = self.top.get(prefix)
+        if top is None:
+            top = heapq.nlargest(self.top_size, [value for _, value in self.sorted[lo:hi]],
+                                 key=self.entries.__getitem__)
+            self.top[prefix] = top
+            if len(self.top) > self.max_top:
+                self.top.popitem(last=False)
+        else:
+            self.top.move_to_end(prefix)
+        return top[:limit]
+
+    def _touch(self, value, index=True):
+        """记录一次使用：更新分数并移动到最新位置，超出上限时淘汰最久未使用的记录"""
+        entries = self.entries
+        self.clock += 1
+        now = self.clock * self.rate
+        old = entries.pop(value, None)
+        score = now if old is None else now + math.log1p(math.exp(old - now))
+        entries[value] = score
+        if not index:
+            while len(entries) > self.max_num:
+                entries.popitem(last=False)
+            return
+
+        folded = value.lower()
+        if old is None:
+            bisect.insort(self.sorted, (folded, value))
+        for prefix, top in self.top.items():
+            if folded.startswith(prefix):
+                self._promote(top, value, score)
+        while len(entries) > self.max_num:
+            self._evict(entries.popitem(last=False)[0])
+
+    def _promote(self, top, value, score):
+        """分数只会增加：从原位置移除后向前插入到分数更低的记录之前"""
+        if value in top:
+            top.remove(value)
+        entries = self.entries
+        i = len(top)
+        while i and entries[top[i - 1]] < score:
+            i -= 1
+        top.insert(i, value)
+        del top[self.top_size:]
+
+    def _evict(self, value):
+        item = (value.lower(), value)
+        i = bisect.bisect_left(self.sorted, item)
+        if i < len(self.sorted) and self.sorted[i] == item:
+            del self.sorted[i]
+        # 缓存中缺少的下一条记录无法得知，丢弃包含该记录的缓存，下次查询时重建
+        for prefix in [prefix for prefix, top in self.top.items() if value in top]:
+            del self.top[prefix]
+
+    def _replay(self, encoding):
+        self.entries.clear()
+        self.journal_lines = 0
+        self.clock = 0
+        with open(self.path, "r", encoding=encoding) as f:
+            for line in f:
+                self.journal_lines += 1
+                value = line.strip()
+                if value:
+                    self._touch(value, index=False)
+
+    def load(self):
+        """从文件重放日志，文件不存在时视为空历史
+
+        文件按UTF-8读取；旧版本按系统默认编码写入的文件无法按UTF-8解码时改用系统默认编码读取，
+        并立即按UTF-8重写，之后追加的记录不会与旧内容的编码混在一起。
+        """
+        converted = False
+        if os.path.exists(self.path):
+            try:
+                self._replay("utf-8")
+            except UnicodeDecodeError:
+                self._replay(locale.getpreferredencoding(False))
+                converted = True
+        else:
+            self.entries.clear()
+            self.journal_lines = 0
+            self.clock = 0
+        # 重放时不维护索引，最后一次性建立
+        self.sorted = sorted((value.lower(), value) for value in self.entries)
+        self.top.clear()
+        self.version += 1
+        if converted or self.journal_lines > self.max_num * self.compact_factor:
+            self.compact()
+
+    def add(self, value):
+        """添加（或再次使用）一条记录，返回历史内容或排序是否发生了变化
+
+        与最新的记录相同时只提高它的分数，不向日志追加重复行。
+        """
+        entries = self.entries
+        repeated = bool(entries) and next(reversed(entries)) == value
+        self._touch(value)
+        self.version += 1
+        if repeated:
+            return True
+
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(value + '\n')
+        self.journal_lines += 1
+
+        if self.journal_lines > self.max_num * self.compact_factor:
+            self.compact()
+        return True
+
+    def compact(self):
+        """用当前内容重写历史文件，先写临时文件再替换，避免中途失败丢失历史
+
+        按分数从低到高写入，重新加载后记录之间的排序不变（使用频率本身不保留）。
+        """
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for value in sorted(self.entries, key=self.entries.__getitem__):
+                f.write(value + '\n')
+        os.replace(tmp_path, self.path)
+        self.journal_lines = len(self.entries)
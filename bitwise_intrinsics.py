@@ -0,0 +1,133 @@
+from functools import lru_cache, partial
+
+# 字节内的位反转表
+_REVERSE_BITS = bytes(int(f"{b:08b}"[::-1], 2) for b in range(256))
+
+if hasattr(int, 'bit_count'):
+    def _bit_count(value):
+        return value.bit_count()
+else:  # Python 3.10之前没有int.bit_count
+    def _bit_count(value):
+        return bin(value).count('1')
+
+
+def popcount(value, width):
+    """置位的位数（按width位补码计算）"""
+    return _bit_count(value & ((1 << width) - 1))
+
+
+def parity(value, width):
+    """奇偶校验位：置位的位数为奇数时为1"""
+    return popcount(value, width) & 1
+
+
+def clz(value, width):
+    """前导0的个数，值为0时返回width"""
+    return width - (value & ((1 << width) - 1)).bit_length()
+
+
+def ctz(value, width):
+    """末尾0的个数，值为0时返回width"""
+    value &= (1 << width) - 1
+    if not value:
+        return width
+    return (value & -value).bit_length() - 1
+
+
+def bitrev(value, width):
+    """反转width位内的位序：查表反转每个字节内的位，再反转字节顺序"""
+    nbytes = (width + 7) // 8
+    data = (value & ((1 << width) - 1)).to_bytes(nbytes, 'little').translate(_REVERSE_BITS)
+    return int.from_bytes(data, 'big') >> (nbytes * 8 - width)
+
+
+def rotl(value, amount, width):
+    """循环左移"""
+    mask = (1 << width) - 1
+    value &= mask
+    amount %= width
+    return ((value << amount) | (value >> (width - amount))) & mask
+
+
+def rotr(value, amount, width):
+    """循环右移"""
+    return rotl(value, -amount, width)
+
+
+def bswap(value, width):
+    """翻转width位内的字节顺序，width必须是8的倍数"""
+    if width % 8:
+        raise ValueError(f"字节序转换要求位大小为8的倍数: {width}")
+    return int.from_bytes((value & ((1 << width) - 1)).to_bytes(width // 8, 'little'), 'big')
+
+
+@lru_cache(maxsize=256)
+def mask_runs(mask):
+    """掩码中连续置位的区间 ((低位, 位数, 紧凑后的起始位), ...)，结果按掩码缓存"""
+    runs = []
+    dest = 0
+    while mask:
+        lo = (mask & -mask).bit_length() - 1
+        shifted = mask >> lo
+        count = (shifted ^ (shifted + 1)).bit_length() - 1
+        runs.append((lo, count, dest))
+        dest += count
+        mask &= ~(((1 << count) - 1) << lo)
+    return tuple(runs)
+
+
+def pext(value, mask, width):
+    """并行位提取：取出mask中置位的位并紧凑打包到低位，每个连续区间只需一次移位和掩码"""
+    mask &= (1 << width) - 1
+    result = 0
+    for lo, count, dest in mask_runs(mask):
+        result |= ((value >> lo) & ((1 << count) - 1)) << dest
+    return result
+
+
+def pdep(value, mask, width):
+    """并行位存放：把value的低位依次放到mask中置位的位置，pext的逆运算"""
+    mask &= (1 << width) - 1
+    result = 0
+    for lo, count, src in mask_runs(mask):
+        result |= ((value >> src) & ((1 << count) - 1)) << lo
+    return result
+
+
+def sext(value, bits, width):
+    """把低bits位作为有符号数符号扩展，结果再按width位补码表示"""
+    if bits <= 0:
+        raise ValueError(f"符号扩展的位数必须为正数: {bits}")
+    value &= (1 << bits) - 1
+    if value >> (bits - 1):
+        value -= 1 << bits
+    return value & ((1 << width) - 1)
+
+
+# 函数名 -> (实现, 参数个数)；实现的最后一个参数为位大小，可在调用时省略，默认为当前位大小
+FUNCTIONS = {
+    'popcount': (popcount, 1),
+    'parity': (parity, 1),
+    'clz': (clz, 1),
+    'ctz': (ctz, 1),
+    'bitrev': (bitrev, 1),
+    'rotl': (rotl, 2),
+    'rotr': (rotr, 2),
+    'bswap': (bswap, 1),
+    'pext': (pext, 2),
+    'pdep': (pdep, 2),
+    'sext': (sext, 2),
+}
+
+
+def bind(name, argc, bit_size):
+    """返回以argc个参数调用函数name的可调用对象；省略位大小参数时使用bit_size"""
+    try:
+        func, arity = FUNCTIONS[name]
+    except KeyError:
+        raise ValueError(f"Unknown function: {name}") from None
+    if argc == arity + 1:
+        return func
+    if argc != arity:
+        raise ValueError(f"{name} 需要 {arity} 个参数（可另加位大小），实际为 {argc} 个")
+    return partial(func, width=bit_size)
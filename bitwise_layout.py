@@ -0,0 +1,176 @@
+import argparse
+import csv
+import json
+import sys
+
+from bitwise_engine import Engine, iter_lines, selection_runs
+
+
+def parse_bits(spec):
+    """解析字段的位范围，返回位索引列表
+
+    支持整数（单个位）、"15:8"（高位:低位，包含两端）以及逗号分隔的组合，如 "15:12,3,1:0"。
+    """
+    if isinstance(spec, int):
+        return [spec]
+    bits = []
+    for part in str(spec).split(','):
+        part = part.strip()
+        if ':' in part:
+            hi, lo = (int(x, 0) for x in part.split(':', 1))
+            bits.extend(range(min(hi, lo), max(hi, lo) + 1))
+        else:
+            bits.append(int(part, 0))
+    if not bits:
+        raise ValueError(f"字段位范围为空: {spec!r}")
+    return bits
+
+
+class Field:
+    """寄存器字段：名称、位范围、是否有符号以及枚举值名称"""
+
+    def __init__(self, name, bits, signed=False, enum=None, description=""):
+        self.name = name
+        self.bits = sorted(set(parse_bits(bits)))
+        self.runs = selection_runs(self.bits)
+        self.width = len(self.bits)
+        self.signed = signed
+        self.enum = {int(k, 0) if isinstance(k, str) else k: v for k, v in (enum or {}).items()}
+        self.description = description
+
+    def bits_text(self):
+        """以 "15:8,3" 的形式描述字段占用的位"""
+        parts = []
+        for lo, width, _ in reversed(self.runs):
+            hi = lo + width - 1
+            parts.append(str(lo) if hi == lo else f"{hi}:{lo}")
+        return ",".join(parts)
+
+    def expression(self, var):
+        """生成提取该字段的Python表达式源码"""
+        parts = []
+        for lo, width, dest in self.runs:
+            part = f"(({var} >> {lo}) & {(1 << width) - 1})" if lo else f"({var} & {(1 << width) - 1})"
+            if dest:
+                part = f"({part} << {dest})"
+            parts.append(part)
+        source = " | ".join(parts)
+        if self.signed:
+            # 符号扩展: (x ^ 符号位) - 符号位
+            sign = 1 << (self.width - 1)
+            source = f"((({source}) ^ {sign}) - {sign})"
+        return source
+
+    def format(self, raw):
+        """字段值的显示文本，有枚举名称时一并显示"""
+        name = self.enum.get(raw)
+        return f"{raw} ({name})" if name is not None else str(raw)
+
+
+class RegisterLayout:
+    """寄存器布局：加载时把所有字段编译为一个函数，一次调用即可解码全部字段"""
+
+    def __init__(self, name, fields, width=None, description=""):
+        self.name = name
+        self.fields = list(fields)
+        self.width = width or max((f.bits[-1] + 1 for f in self.fields), default=0)
+        self.description = description
+        self.decode = self._compile()
+
+    def _compile(self):
+        """生成形如 lambda v: (字段0, 字段1, ...) 的解码函数，所有移位和掩码都是常量"""
+        items = "".join(f"{field.expression('v')}, " for field in self.fields)
+        return eval(compile(f"lambda v: ({items})", f"<layout {self.name}>", "eval"), {})
+
+    def describe(self, value):
+        """返回每个字段的(字段, 原始值, 显示文本)"""
+        return [(field, raw, field.format(raw)) for field, raw in zip(self.fields, self.decode(value))]
+
+    def decode_many(self, values):
+        """批量解码，逐个产生字段值元组"""
+        return map(self.decode, values)
+
+    def decode_array(self, words):
+        """使用NumPy对字数组解码，返回 {字段名: 数组}；有符号字段返回有符号数组"""
+        from bitwise_vector import extract_bits
+        result = {}
+        for field in self.fields:
+            raw = extract_bits(words, field.bits)
+            if field.signed:
+                bits = raw.dtype.itemsize * 8
+                raw = raw.view(raw.dtype.str.replace('u', 'i'))
+                if field.width < bits:
+                    shift = raw.dtype.type(bits - field.width)
+                    raw = (raw << shift) >> shift
+            result[field.name] = raw
+        return result
+
+    @classmethod
+    def from_dict(cls, data):
+        fields = [Field(f["name"], f["bits"], f.get("signed", False), f.get("enum"),
+                        f.get("description", "")) for f in data["fields"]]
+        return cls(data.get("name", "register"), fields, data.get("width"), data.get("description", ""))
+
+
+def load_layouts(path):
+    """从JSON文件加载寄存器布局，文件内容可以是单个布局或布局列表
+
+    布局格式:
+        {"name": "CTRL", "width": 32, "fields": [
+            {"name": "EN", "bits": 0},
+            {"name": "MODE", "bits": "3:1", "enum": {"0": "OFF", "1": "ON"}},
+            {"name": "OFFSET", "bits": "15:8", "signed": true}]}
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = [data]
+    return [RegisterLayout.from_dict(item) for item in data]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="按寄存器布局批量解码数值，输出CSV")
+    parser.add_argument("layout", help="寄存器布局JSON文件")
+    parser.add_argument("files", nargs="*", help="输入文件，每行一个数值或表达式，'-' 表示标准输入（默认）")
+    parser.add_argument("-r", "--register", help="布局文件包含多个寄存器时选择其中之一（默认第一个）")
+    parser.add_argument("-i", "--input-base", type=int, choices=[2, 8, 10, 16], default=10,
+                        help="不带前缀的数值的进制（默认10）")
+    parser.add_argument("--enum-names", action="store_true", help="输出枚举名称而不是数值")
+    args = parser.parse_args(argv)
+
+    layouts = load_layouts(args.layout)
+    if args.register:
+        matches = [layout for layout in layouts if layout.name == args.register]
+        if not matches:
+            parser.error(f"布局文件中没有寄存器 {args.register}")
+        layout = matches[0]
+    else:
+        layout = layouts[0]
+
+    engine = Engine(bit_size=max(layout.width, 1), base=args.input_base)
+    writer = csv.writer(sys.stdout, lineterminator='\n')
+    writer.writerow(["value"] + [field.name for field in layout.fields])
+    decode = layout.decode
+    errors = 0
+    for line in iter_lines(args.files):
+        text = line.strip()
+        if not text:
+            continue
+        value = engine.evaluate(text)
+        if value is None or isinstance(value, float):
+            errors += 1
+            writer.writerow([text])
+            continue
+        row = decode(value)
+        if args.enum_names:
+            row = [field.enum.get(raw, raw) for field, raw in zip(layout.fields, row)]
+        writer.writerow([text, *row])
+
+    if errors:
+        print(f"{errors} 行无法解析", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
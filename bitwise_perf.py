@@ -0,0 +1,121 @@
+import json
+import time
+from collections import deque
+
+
+class StageStats:
+    """单个阶段的调用次数和最近若干次调用的耗时"""
+
+    def __init__(self, max_samples=1024):
+        self.count = 0
+        self.total = 0.0
+        self.samples = deque(maxlen=max_samples)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.samples.append(seconds)
+
+    def percentile(self, q):
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "total_ms": self.total * 1000,
+            "p50_ms": self.percentile(0.50) * 1000,
+            "p99_ms": self.percentile(0.99) * 1000,
+            "max_ms": max(self.samples, default=0.0) * 1000,
+        }
+
+
+class Instrumentation:
+    """重算流程的计时与计数
+
+    启用时用计时包装替换对象实例上的方法，停用时删除包装恢复为类上的原方法，
+    因此停用状态下没有任何额外开销。阶段耗时包含其中嵌套调用的其他阶段。
+    """
+
+    def __init__(self, max_samples=1024):
+        self.max_samples = max_samples
+        self.enabled = False
+        self.targets = []
+        self.stages = {}
+        # 计数器名称 -> 返回当前累计值的函数
+        self.counter_sources = {}
+        self.counter_base = {}
+
+    def attach(self, obj, names):
+        """登记需要计时的方法，阶段名即方法名"""
+        for name in names:
+            self.targets.append((obj, name))
+            self.stages.setdefault(name, StageStats(self.max_samples))
+
+    def add_counter(self, name, source):
+        """登记计数器，source返回单调递增的累计值，统计结果为启用（或重置）以来的增量"""
+        self.counter_sources[name] = source
+        self.counter_base[name] = source()
+
+    def wrap(self, func, stats):
+        perf_counter = time.perf_counter
+
+        def timed(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                stats.add(perf_counter() - start)
+        return timed
+
+    def enable(self):
+        if self.enabled:
+            return
+        self.reset()
+        self.enabled = True
+        for obj, name in self.targets:
+            setattr(obj, name, self.wrap(getattr(obj, name), self.stages[name]))
+
+    def disable(self):
+        if not self.enabled:
+            return
+        self.enabled = False
+        for obj, name in self.targets:
+            obj.__dict__.pop(name, None)
+
+    def reset(self):
+        for name in self.stages:
+            self.stages[name] = StageStats(self.max_samples)
+        if self.enabled:
+            # 包装函数持有旧的统计对象，重新包装
+            for obj, name in self.targets:
+                obj.__dict__.pop(name, None)
+                setattr(obj, name, self.wrap(getattr(obj, name), self.stages[name]))
+        for name, source in self.counter_sources.items():
+            self.counter_base[name] = source()
+
+    def snapshot(self):
+        return {
+            "enabled": self.enabled,
+            "stages": {name: stats.snapshot() for name, stats in self.stages.items()},
+            "counters": {name: source() - self.counter_base[name]
+                         for name, source in self.counter_sources.items()},
+        }
+
+    def format_table(self):
+        """以文本表格形式输出统计结果，用于调试浮窗"""
+        snapshot = self.snapshot()
+        lines = [f"{'阶段':<26} {'次数':>7} {'p50(ms)':>9} {'p99(ms)':>9} {'最大(ms)':>9}"]
+        for name, stats in snapshot["stages"].items():
+            lines.append(f"{name:<26} {stats['count']:>7} {stats['p50_ms']:>9.3f} "
+                         f"{stats['p99_ms']:>9.3f} {stats['max_ms']:>9.3f}")
+        lines.append("")
+        for name, value in snapshot["counters"].items():
+            lines.append(f"{name:<26} {value:>7}")
+        return "\n".join(lines)
+
+    def dump_json(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
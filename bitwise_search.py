@@ -0,0 +1,129 @@
+import re
+
+try:
+    import numpy as np
+except ImportError:  # numpy为可选依赖，没有时掩码匹配改用正则表达式
+    np = None
+
+
+def pattern_bytes(value, mask, bit_size, little_endian=True, shift=0):
+    """把bit_size位的值/掩码转换为字节串形式的(模式, 掩码)
+
+    小端时字节流按低位在前的顺序排列位，大端时按高位在前；
+    shift为模式在首字节内的起始位（0-7），用于按位对齐的查找。
+    """
+    full = (1 << bit_size) - 1
+    mask &= full
+    value &= mask
+    nbytes = (bit_size + shift + 7) // 8
+    if little_endian:
+        value <<= shift
+        mask <<= shift
+    else:
+        pad = nbytes * 8 - bit_size - shift
+        value <<= pad
+        mask <<= pad
+    order = 'little' if little_endian else 'big'
+    return value.to_bytes(nbytes, order), mask.to_bytes(nbytes, order)
+
+
+def _trim(pattern, mask):
+    """去掉首尾掩码为0的字节，返回(首部去掉的字节数, 模式, 掩码)"""
+    lead = len(mask) - len(mask.lstrip(b'\0'))
+    end = len(mask.rstrip(b'\0'))
+    return lead, pattern[lead:end], mask[lead:end]
+
+
+def _byte_class(p, m):
+    """正则表达式中匹配 (b & m) == p 的全部字节b"""
+    if m == 0xFF:
+        return re.escape(bytes([p]))
+    if m == 0:
+        return b'.'
+    return b'[' + b''.join(re.escape(bytes([b])) for b in range(256) if b & m == p) + b']'
+
+
+class _ByteMatcher:
+    """在字节流中查找 (窗口 & 掩码) == 模式 的全部字节偏移
+
+    掩码全为0xFF时使用find；否则有NumPy时对整块数据逐字节向量化比较，
+    没有NumPy时使用等价的正则表达式（先行断言，允许重叠匹配）。
+    """
+
+    def __init__(self, pattern, mask):
+        self.lead, self.pattern, self.mask = _trim(pattern, mask)
+        if not self.pattern:
+            raise ValueError("掩码为0，任意位置都匹配")
+        self.length = len(self.pattern)
+        self.exact = self.mask == b'\xff' * self.length
+        self.regex = None
+        if not self.exact and np is None:
+            body = b''.join(_byte_class(p, m) for p, m in zip(self.pattern, self.mask))
+            self.regex = re.compile(b'(?=' + body + b')', re.S)
+
+    def find(self, buffer, start, end, size):
+        """返回匹配起点位于[start, end)内的偏移列表（升序，按去掉首部之前的模式计算）"""
+        start += self.lead
+        end = min(end + self.lead, size - self.length + 1)
+        if start >= end:
+            return []
+        stop = end + self.length - 1
+        if self.exact:
+            hits = []
+            find = buffer.find
+            pos = find(self.pattern, start, stop)
+            while pos != -1:
+                hits.append(pos - self.lead)
+                pos = find(self.pattern, pos + 1, stop)
+            return hits
+        if self.regex is not None:
+            return [m.start() - self.lead for m in self.regex.finditer(buffer, start, stop)]
+
+        data = np.frombuffer(buffer, dtype=np.uint8, count=stop - start, offset=start)
+        count = end - start
+        match = None
+        for k, (p, m) in enumerate(zip(self.pattern, self.mask)):
+            if m == 0:
+                continue
+            window = data[k:k + count]
+            equal = (window == p) if m == 0xFF else ((window & m) == p)
+            if match is None:
+                match = equal
+            else:
+                match &= equal
+        return (np.flatnonzero(match) + (start - self.lead)).tolist()
+
+
+def search(buffer, value, mask, bit_size, little_endian=True, bit_aligned=False, chunk_size=4 << 20):
+    """在buffer（bytes、bytearray或mmap）中查找掩码匹配的bit_size位模式
+
+    返回逐块产生(已扫描的字节数, 本块内命中的位偏移列表)的迭代器，调用方可以边查找边显示结果和进度；
+    掩码为0时立即抛出ValueError。
+    按字节对齐时位偏移都是8的倍数，命中处按相同端序读取bit_size位的值满足 (值 & mask) == (value & mask)；
+    按位对齐时依次在字节内的8个起始位上查找。
+    """
+    shifts = range(8) if bit_aligned else (0,)
+    matchers = [(shift, _ByteMatcher(*pattern_bytes(value, mask, bit_size, little_endian, shift)))
+                for shift in shifts]
+    return _scan(buffer, matchers, bit_aligned, chunk_size)
+
+
+def _scan(buffer, matchers, bit_aligned, chunk_size):
+    size = len(buffer)
+    for start in range(0, size, chunk_size):
+        end = min(start + chunk_size, size)
+        hits = []
+        for shift, matcher in matchers:
+            hits.extend(offset * 8 + shift for offset in matcher.find(buffer, start, end, size))
+        if bit_aligned:
+            hits.sort()
+        yield end, hits
+
+
+def find_all(buffer, value, mask, bit_size, little_endian=True, bit_aligned=False):
+    """返回全部命中的位偏移列表"""
+    hits = []
+    for _, chunk_hits in search(buffer, value, mask, bit_size, little_endian, bit_aligned):
+        hits.extend(chunk_hits)
+    return hits
+
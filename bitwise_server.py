@@ -0,0 +1,180 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+from collections import OrderedDict
+
+from bitwise_engine import BASE_NAMES, Engine, format_number, format_result, parse_bases
+from bitwise_expr import ExpressionCache
+
+# 单行请求的最大长度：百万位的十进制数值约30万个字符
+MAX_LINE = 16 * 1024 * 1024
+
+BASE_LABELS = {base: name for name, base in BASE_NAMES.items()}
+
+# 写缓冲超过该大小时等待客户端读取，避免只发送不读取的客户端占满内存
+WRITE_HIGH_WATER = 1024 * 1024
+
+# 请求允许的最大位大小，与界面支持的最大位宽一致
+MAX_BITS = 65536
+
+
+class EvaluationServer:
+    """无界面的计算服务：每行一个请求，按接收顺序逐行返回结果
+
+    客户端可以连续发送多个请求而不必等待结果（流水线），所有连接共用一个表达式编译缓存。
+    计算规则与BinaryCalculator.calculate相同，由Engine完成。
+
+    请求为JSON对象时返回JSON对象:
+        {"id": 1, "expr": "0x12 << 4", "bits": 32, "base": 16, "scientific": false, "bases": ["hex", "dec"]}
+        -> {"id": 1, "ok": true, "value": "288", "results": {"hex": "0x120", "dec": "288"}}
+    除expr外均可省略，省略时使用服务启动参数；无效表达式返回 {"id": 1, "ok": false, "error": "..."}。
+    bits超过max_bits的请求被拒绝。其他行作为表达式按启动参数计算，返回与批量计算命令行相同格式的一行文本。
+
+    计算在事件循环中同步执行：表达式计算是纯Python的CPU运算，放到线程池中也无法并行，
+    因此一个耗时很长的表达式（如很宽的位大小上的大数运算）会让其他连接等待它完成。
+    需要隔离慢请求时应运行多个服务进程。
+    """
+
+    def __init__(self, bit_size=64, base=10, scientific_mode=False, bases=(16,), cache_size=4096,
+                 max_bits=MAX_BITS, max_engines=64):
+        if not 0 < bit_size <= max_bits:
+            raise ValueError(f"位大小必须在1到{max_bits}之间: {bit_size}")
+        self.bit_size = bit_size
+        self.base = base
+        self.scientific_mode = scientific_mode
+        self.bases = list(bases)
+        self.cache = ExpressionCache(cache_size)
+        self.max_bits = max_bits
+        # (位大小, 进制, 科学计算模式) -> 共用self.cache的计算引擎，超过max_engines时淘汰最久未使用的
+        self.max_engines = max_engines
+        self.engines = OrderedDict()
+        self.clients = 0
+        self.requests = 0
+
+    def engine(self, bit_size, base, scientific_mode):
+        key = (bit_size, base, scientific_mode)
+        engine = self.engines.get(key)
+        if engine is None:
+            engine = self.engines[key] = Engine(bit_size, base, scientific_mode, cache=self.cache)
+            if len(self.engines) > self.max_engines:
+                self.engines.popitem(last=False)
+        else:
+            self.engines.move_to_end(key)
+        return engine
+
+    def handle_text(self, line):
+        expression = line.strip()
+        if not expression:
+            return '\n'
+        value = self.engine(self.bit_size, self.base, self.scientific_mode).evaluate(expression)
+        return format_result(expression, value, self.bases)
+
+    def handle_json(self, line):
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("请求必须是JSON对象")
+            bit_size = int(request.get("bits", self.bit_size))
+            base = int(request.get("base", self.base))
+            if not 0 < bit_size <= self.max_bits:
+                raise ValueError(f"位大小必须在1到{self.max_bits}之间: {bit_size}")
+            if base not in BASE_NAMES.values():
+                raise ValueError(f"无效的进制: {base}")
+            bases = request.get("bases")
+            bases = parse_bases(",".join(map(str, bases))) if bases else self.bases
+            engine = self.engine(bit_size, base, bool(request.get("scientific", self.scientific_mode)))
+            expression = str(request["expr"])
+        except Exception as e:
+            return json.dumps({"ok": False, "error": f"无效的请求: {e}"}) + '\n'
+
+        response = {"id": request.get("id")} if "id" in request else {}
+        value = engine.evaluate(expression)
+        if value is None:
+            response.update(ok=False, error="无效的表达式")
+        else:
+            response.update(ok=True, value=format_number(value, 10),
+                            results={BASE_LABELS[b]: format_number(value, b) for b in bases})
+        return json.dumps(response, ensure_ascii=False) + '\n'
+
+    def handle_line(self, line):
+        self.requests += 1
+        if line.lstrip().startswith('{'):
+            return self.handle_json(line)
+        return self.handle_text(line)
+
+    async def serve_client(self, reader, writer):
+        self.clients += 1
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ValueError, asyncio.LimitOverrunError):
+                    writer.write(json.dumps({"ok": False, "error": "请求过长"}).encode() + b'\n')
+                    break
+                if not line:
+                    break
+                writer.write(self.handle_line(line.decode('utf-8', 'replace')).encode('utf-8'))
+                # 流水线请求连续处理，只在写缓冲积压时等待
+                if writer.transport.get_write_buffer_size() > WRITE_HIGH_WATER:
+                    await writer.drain()
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.clients -= 1
+            writer.close()
+
+    async def start(self, path=None, host="127.0.0.1", port=8765):
+        if path:
+            if os.path.exists(path):
+                os.unlink(path)
+            return await asyncio.start_unix_server(self.serve_client, path, limit=MAX_LINE)
+        return await asyncio.start_server(self.serve_client, host, port, limit=MAX_LINE)
+
+
+async def serve(server, path=None, host="127.0.0.1", port=8765):
+    listener = await server.start(path, host, port)
+    if path:
+        where = path
+    else:
+        host, port = listener.sockets[0].getsockname()[:2]
+        where = f"{host}:{port}"
+    print(f"计算服务已启动: {where}", file=sys.stderr)
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        if path and os.path.exists(path):
+            os.unlink(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="本地计算服务：通过Unix套接字或本机TCP端口接收表达式并返回结果")
+    parser.add_argument("--unix", metavar="PATH", help="监听的Unix套接字路径（指定后不监听TCP）")
+    parser.add_argument("--host", default="127.0.0.1", help="TCP监听地址（默认127.0.0.1）")
+    parser.add_argument("--port", type=int, default=8765, help="TCP监听端口（默认8765）")
+    parser.add_argument("-b", "--bits", type=int, default=64, help="默认位大小（默认64）")
+    parser.add_argument("-i", "--input-base", type=int, choices=[2, 8, 10, 16], default=10,
+                        help="不带前缀的单个数值的默认进制（默认10）")
+    parser.add_argument("-o", "--output-bases", type=parse_bases, default=[16],
+                        help="文本请求的输出进制，逗号分隔（默认hex）")
+    parser.add_argument("-s", "--scientific", action="store_true", help="默认使用科学计算模式")
+    parser.add_argument("--cache-size", type=int, default=4096, help="共用表达式缓存的容量（默认4096）")
+    parser.add_argument("--max-bits", type=int, default=MAX_BITS, help=f"请求允许的最大位大小（默认{MAX_BITS}）")
+    args = parser.parse_args(argv)
+    if not 0 < args.bits <= args.max_bits:
+        parser.error(f"位大小必须在1到{args.max_bits}之间: {args.bits}")
+
+    server = EvaluationServer(args.bits, args.input_base, args.scientific, args.output_bases, args.cache_size,
+                              args.max_bits)
+    try:
+        asyncio.run(serve(server, args.unix, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+from collections import deque
+
+# 每个步骤除差值外的固定开销（对象、元组和各字段），用于估算内存占用
+STEP_OVERHEAD = 120
+
+
+class Step:
+    """一次数值修改：修改前后两个值的异或差值（去掉末尾的0后保存）及修改时的位大小和进制
+
+    check为修改后的值的哈希，撤销或重做前用它确认当前值仍是该步骤所对应的值。
+    """
+
+    __slots__ = ('delta', 'shift', 'bit_size', 'base', 'endian', 'check')
+
+    def __init__(self, delta, bit_size, base, endian, check):
+        self.shift = (delta & -delta).bit_length() - 1 if delta else 0
+        self.delta = delta >> self.shift
+        self.bit_size = bit_size
+        self.base = base
+        self.endian = endian
+        self.check = check
+
+    def apply(self, value):
+        return value ^ (self.delta << self.shift)
+
+    @property
+    def size(self):
+        return STEP_OVERHEAD + (self.delta.bit_length() + 7) // 8
+
+
+class UndoHistory:
+    """按异或差值保存的撤销/重做记录
+
+    占用的内存与修改的位的跨度成正比，与数值的位大小无关；撤销和重做每步为O(1)次操作。
+    超过max_bytes时淘汰最早的步骤。
+    """
+
+    def __init__(self, max_bytes=4 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.undo_steps = deque()
+        self.redo_steps = []
+        self.bytes = 0
+
+    def __len__(self):
+        return len(self.undo_steps)
+
+    def can_undo(self):
+        return bool(self.undo_steps)
+
+    def can_redo(self):
+        return bool(self.redo_steps)
+
+    def record(self, old, new, bit_size, base, endian=False):
+        """记录一次从old到new的修改，endian表示同时切换了端序；清空重做记录"""
+        if old == new and not endian:
+            return
+        step = Step(old ^ new, bit_size, base, endian, hash(new))
+        for redo in self.redo_steps:
+            self.bytes -= redo.size
+        self.redo_steps.clear()
+        self.undo_steps.append(step)
+        self.bytes += step.size
+        while self.bytes > self.max_bytes and self.undo_steps:
+            self.bytes -= self.undo_steps.popleft().size
+
+    def undo(self, value):
+        """撤销最近一步，返回(修改前的值, 步骤)；当前值与记录不符时清空全部记录并返回None"""
+        if not self.undo_steps:
+            return None
+        step = self.undo_steps[-1]
+        if hash(value) != step.check:
+            self.clear()
+            return None
+        self.undo_steps.pop()
+        self.redo_steps.append(step)
+        return step.apply(value), step
+
+    def redo(self, value):
+        """重做最近撤销的一步，返回(修改后的值, 步骤)；当前值与记录不符时清空全部记录并返回None"""
+        if not self.redo_steps:
+            return None
+        step = self.redo_steps[-1]
+        result = step.apply(value)
+        if hash(result) != step.check:
+            self.clear()
+            return None
+        self.redo_steps.pop()
+        self.undo_steps.append(step)
+        return result, step
+
+    def clear(self):
+        self.undo_steps.clear()
+        self.redo_steps.clear()
+        self.bytes = 0
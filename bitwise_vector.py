@@ -0,0 +1,86 @@
+from bitwise_engine import selection_runs
+
+try:
+    import numpy as np
+except ImportError:  # numpy为可选依赖，只有向量化接口需要
+    np = None
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("向量化计算需要安装numpy: pip install numpy")
+
+
+def packed_dtype(width):
+    """返回能容纳width位结果的最小无符号整数类型"""
+    _require_numpy()
+    for dtype in (np.uint8, np.uint16, np.uint32, np.uint64):
+        if width <= np.dtype(dtype).itemsize * 8:
+            return np.dtype(dtype)
+    raise ValueError(f"结果位宽超过64位: {width}")
+
+
+def as_unsigned(words):
+    """将整数数组按相同字宽视为无符号数组（不复制数据）"""
+    _require_numpy()
+    words = np.asarray(words)
+    if words.dtype.kind not in 'ui':
+        raise TypeError(f"需要整数数组，实际为: {words.dtype}")
+    return words.view(np.dtype(f"u{words.dtype.itemsize}"))
+
+
+def extract_bits(words, selected_bits):
+    """从数组中每个字提取选中的位并紧凑打包，返回新数组
+
+    selected_bits 与位画布的selected_bits相同：位索引的集合，可以连续也可以不连续，
+    例如 range(lo, hi + 1) 或 {0, 3, 7}。每个连续区间只需一次移位和掩码，
+    运算次数与区间数量成正比，与数组长度之外的位数无关。
+    """
+    words = as_unsigned(words)
+    word_bits = words.dtype.itemsize * 8
+    runs = selection_runs(selected_bits)
+    if not runs:
+        return np.zeros(words.shape, dtype=np.uint8)
+
+    lo, width, _ = runs[-1]
+    if lo + width > word_bits:
+        raise ValueError(f"选中的位 {lo + width - 1} 超出了 {word_bits} 位的字宽")
+    out_dtype = packed_dtype(runs[-1][2] + width)
+
+    # 在输入与输出中较宽的类型上运算，避免移位溢出
+    work_dtype = np.promote_types(words.dtype, out_dtype)
+    work_type = work_dtype.type
+    words = words.astype(work_dtype, copy=False)
+
+    # 连续选择的快速路径: (v >> lo) & ((1 << n) - 1)
+    if len(runs) == 1:
+        lo, width, _ = runs[0]
+        field = (words >> work_type(lo)) & work_type((1 << width) - 1)
+        return field.astype(out_dtype, copy=False)
+
+    result = np.zeros(words.shape, dtype=work_dtype)
+    field = np.empty_like(result)
+    for lo, width, dest in runs:
+        np.right_shift(words, work_type(lo), out=field)
+        np.bitwise_and(field, work_type((1 << width) - 1), out=field)
+        if dest:
+            np.left_shift(field, work_type(dest), out=field)
+        np.bitwise_or(result, field, out=result)
+    return result.astype(out_dtype, copy=False)
+
+
+def extract_field(words, lo, hi):
+    """提取每个字的第lo到hi位（包含两端）"""
+    return extract_bits(words, range(min(lo, hi), max(lo, hi) + 1))
+
+
+def byteswap_words(words, word_bits=None):
+    """批量端序转换：word_bits为None时翻转每个元素的字节序，
+    否则在元素内每个word_bits位的字内翻转，字之间的位置不变；返回新数组"""
+    words = as_unsigned(words)
+    if word_bits is None or word_bits == words.dtype.itemsize * 8:
+        return words.byteswap()
+    if word_bits % 8 or words.dtype.itemsize * 8 % word_bits:
+        raise ValueError(f"字宽 {word_bits} 无法整除元素宽度 {words.dtype.itemsize * 8}")
+    parts = np.ascontiguousarray(words).view(np.dtype(f"u{word_bits // 8}"))
+    return parts.byteswap().view(words.dtype)
@@ -0,0 +1,218 @@
+import re
+from collections import OrderedDict
+
+from bitwise_convert import int_to_str
+from bitwise_engine import truncate
+from bitwise_expr import compile_template
+
+ASSIGNMENT = re.compile(r'\s*([A-Za-z_]\w*)\s*=(?!=)\s*(.*?)\s*$', re.S)
+
+
+def parse_assignment(text):
+    """解析 "名称 = 表达式" 形式的赋值语句，返回(名称, 表达式)，不是赋值语句时返回None"""
+    match = ASSIGNMENT.match(text)
+    if match is None:
+        return None
+    return match.group(1), match.group(2)
+
+
+class Register:
+    """命名寄存器：定义它的表达式、编译后的模板、引用的名称和当前值（无法计算时为None）"""
+
+    __slots__ = ('name', 'text', 'template', 'deps', 'value')
+
+    def __init__(self, name, text, template):
+        self.name = name
+        self.text = text
+        self.template = template
+        self.deps = template.variables
+        self.value = None
+
+
+class Workspace:
+    """命名寄存器/变量及其依赖关系
+
+    寄存器的表达式可以引用其他寄存器，例如 r0 = 0x1234、mask = r0 & 0xFF00。
+    修改一个寄存器时只按拓扑顺序重算直接或间接依赖它的寄存器，
+    某个寄存器的值没有变化时，只依赖它的寄存器不再重算。
+    结果与calculate相同，按bit_size截断，负数使用补码表示。
+    """
+
+    def __init__(self, bit_size=64, scientific_mode=False, max_templates=256):
+        self.bit_size = bit_size
+        self.scientific_mode = scientific_mode
+        self.registers = {}
+        # 名称 -> 引用该名称的寄存器集合；被引用的名称可以尚未定义
+        self.dependents = {}
+        # 不是赋值语句的表达式的编译缓存
+        self.max_templates = max_templates
+        self.templates = OrderedDict()
+        # 累计重算的寄存器个数
+        self.evaluations = 0
+        # 最近一次保存的赋值语句(名称, 表达式)，预览时不再基于它修改后的状态重算
+        self.committed = None
+
+    def __contains__(self, name):
+        return name in self.registers
+
+    def __len__(self):
+        return len(self.registers)
+
+    def value(self, name):
+        register = self.registers.get(name)
+        return register.value if register is not None else None
+
+    def compile(self, text):
+        """编译引用寄存器的表达式，结果按(表达式, 科学计算模式, 位大小)缓存；语法错误时抛出ValueError"""
+        key = (text, self.scientific_mode, self.bit_size)
+        template = self.templates.get(key)
+        if template is None:
+            template = compile_template(text, self.scientific_mode, self.bit_size)
+            self.templates[key] = template
+            if len(self.templates) > self.max_templates:
+                self.templates.popitem(last=False)
+        else:
+            self.templates.move_to_end(key)
+        return template
+
+    def compute(self, template):
+        """用寄存器的当前值计算模板，引用了未定义或无法计算的寄存器时返回None"""
+        if template is None:
+            return None
+        values = []
+        for name in template.variables:
+            value = self.value(name)
+            if value is None:
+                return None
+            values.append(value)
+        try:
+            return truncate(template.function(*values), self.bit_size)
+        except Exception:
+            return None
+
+    def evaluate(self, text):
+        """计算引用寄存器的表达式（不修改任何寄存器），表达式无效时返回None"""
+        try:
+            template = self.compile(text)
+        except ValueError:
+            return None
+        return self.compute(template)
+
+    def assign(self, name, text):
+        """定义或修改寄存器，返回值发生变化的寄存器名称列表（按重算顺序）
+
+        表达式引用寄存器自身时（如 r0 = r0 + 1）用当前值计算一次，结果作为常量保存；
+        会形成循环依赖的定义抛出ValueError，原定义保持不变。
+        """
+        statement = (name, text)
+        template = compile_template(text, self.scientific_mode, self.bit_size)
+        if name in template.variables:
+            value = self.compute(template)
+            if value is None:
+                raise ValueError(f"无法计算: {text}")
+            text = int_to_str(value) if isinstance(value, int) else repr(value)
+            template = compile_template(text, self.scientific_mode, self.bit_size)
+        elif name in self.upstream(template.variables):
+            raise ValueError(f"循环依赖: {name}")
+
+        old = self.registers.get(name)
+        if old is not None:
+            self.unlink(old)
+        register = self.registers[name] = Register(name, text, template)
+        for dep in register.deps:
+            self.dependents.setdefault(dep, set()).add(name)
+        if old is not None:
+            register.value = old.value
+        self.committed = statement
+        return self.recompute([name])
+
+    def preview(self, name, text):
+        """计算赋值语句 name = text 的值而不保存
+
+        刚保存过的同一条语句返回保存的值：引用自身的赋值（如 r0 = r0 + 1）只按赋值前的值计算一次，
+        不会基于已经修改后的寄存器再计算一次。
+        """
+        if self.committed == (name, text) and name in self.registers:
+            return self.value(name)
+        return self.evaluate(text)
+
+    def unlink(self, register):
+        for dep in register.deps:
+            self.dependents[dep].discard(register.name)
+
+    def remove(self, name):
+        """删除寄存器，返回值发生变化（变为None）的寄存器名称列表"""
+        register = self.registers.pop(name, None)
+        if register is None:
+            return []
+        self.unlink(register)
+        return self.recompute(sorted(self.dependents.get(name, ())))
+
+    def configure(self, bit_size, scientific_mode):
+        """位大小或计算模式变化时重新编译并重算全部寄存器，返回值发生变化的寄存器名称列表"""
+        if bit_size == self.bit_size and scientific_mode == self.scientific_mode:
+            return []
+        self.bit_size = bit_size
+        self.scientific_mode = scientific_mode
+        # 内置函数的默认位大小编译在模板中，两者变化都需要重新编译
+        self.templates.clear()
+        for register in self.registers.values():
+            # 在新模式下无效的定义保留依赖关系，值变为None
+            try:
+                register.template = compile_template(register.text, scientific_mode, bit_size)
+            except ValueError:
+                register.template = None
+        return self.recompute(list(self.registers))
+
+    def upstream(self, names):
+        """names及其直接或间接引用的全部名称"""
+        seen = set(names)
+        stack = list(seen)
+        while stack:
+            register = self.registers.get(stack.pop())
+            if register is None:
+                continue
+            for dep in register.deps:
+                if dep not in seen:
+                    seen.add(dep)
+                    stack.append(dep)
+        return seen
+
+    def order(self, roots):
+        """roots及其全部下游寄存器的拓扑顺序（被依赖的在前）"""
+        order = []
+        seen = set()
+        for root in roots:
+            if root in seen:
+                continue
+            seen.add(root)
+            stack = [(root, iter(self.dependents.get(root, ())))]
+            while stack:
+                name, children = stack[-1]
+                for child in children:
+                    if child not in seen:
+                        seen.add(child)
+                        stack.append((child, iter(self.dependents.get(child, ()))))
+                        break
+                else:
+                    stack.pop()
+                    order.append(name)
+        order.reverse()
+        return order
+
+    def recompute(self, roots):
+        """重算roots及其下游寄存器，返回值发生变化的寄存器名称列表；值未变化的寄存器不再向下游传播"""
+        changed = []
+        dirty = set(roots)
+        for name in self.order(roots):
+            register = self.registers.get(name)
+            if name not in dirty or register is None:
+                continue
+            value = self.compute(register.template)
+            self.evaluations += 1
+            if value == register.value and type(value) is type(register.value):
+                continue
+            register.value = value
+            changed.append(name)
+            dirty.update(self.dependents.get(name, ()))
+        return changed
@@ -60,6 +60,22 @@ function run() {
     run_cmd python $TOP_DIR/bitwise_calculator.py
 }
 
+function profile() {
+    run_cmd python $TOP_DIR/bitwise_calculator.py --profile-startup
+}
+
+function batch() { # ARGS
+    run_cmd python $TOP_DIR/bitwise_engine.py $@
+}
+
+function serve() { # ARGS
+    run_cmd python $TOP_DIR/bitwise_server.py $@
+}
+
+function bench() { # ARGS
+    run_cmd python $TOP_DIR/benchmarks/suite.py $@
+}
+
 function pack() { # PARAMS
     # if [[ "$OSTYPE" == "darwin"* ]]; then
     local params="$@"
@@ -0,0 +1,98 @@
+import os
+import sys
+import tempfile
+import tkinter as tk
+from tkinter import ttk
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bitwise_calculator import BinaryCalculator
+from bitwise_engine import Engine
+
+
+def make_root():
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        raise unittest.SkipTest(f"需要图形显示: {e}")
+    root.withdraw()
+    return root
+
+
+class CalculatorTestCase(unittest.TestCase):
+    """在隐藏的根窗口上创建计算器，历史记录写入临时文件"""
+
+    def setUp(self):
+        self.root = make_root()
+        self.app = BinaryCalculator(self.root)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.app.history_store.path = os.path.join(self.tmp.name, "history.txt")
+
+    def tearDown(self):
+        self.root.destroy()
+        self.tmp.cleanup()
+
+    def enter(self, text):
+        """在数值输入框中输入一行并按回车（含松开回车键产生的事件）"""
+        self.app.history_combo.set(text)
+        self.app.calculate_on_enter(None)
+        self.app.on_history_keyrelease(type("Event", (), {"keysym": "Return"})())
+        self.root.update()
+
+
+class RegisterAssignmentTest(CalculatorTestCase):
+    def test_self_assignment_displays_stored_value(self):
+        self.enter("r0 = 5")
+        self.enter("r0 = r0 + 1")
+        self.assertEqual(self.app.workspace.value("r0"), 6)
+        self.assertEqual(self.app.get_current_value(), self.app.workspace.value("r0"))
+
+        # 之后重新预览同一行（如按其他键触发的重算）仍显示保存的值
+        self.app.recompute_history_input()
+        self.root.update()
+        self.assertEqual(self.app.get_current_value(), self.app.workspace.value("r0"))
+
+
+class EngineConsistencyTest(CalculatorTestCase):
+    def test_same_input_same_result_as_engine(self):
+        engine = Engine(64)
+        self.app.bit_size_var.set(64)
+        self.app.auto_detect_bits_var.set(False)
+        for text in ["5", "0x10", "-5", "-0x10", "0-5", "2*-3", "3 + 4", "1e3", "0d10", "12 34"]:
+            with self.subTest(text=text):
+                self.app.base_var.set(10)
+                self.app.current_value_set(text)
+                self.app.calculate_and_update(add_to_history=False)
+                expected = engine.evaluate(text)
+                if expected is None:
+                    # 无效的表达式不修改输入
+                    self.assertEqual(self.app.current_value_get(), text)
+                else:
+                    self.assertEqual(self.app.get_current_value(), expected)
+
+
+def find_widget(widget, cls, text):
+    """在widget的子孙控件中查找指定类型和文本的控件"""
+    for child in widget.winfo_children():
+        if isinstance(child, cls) and child.cget("text") == text:
+            return child
+        found = find_widget(child, cls, text)
+        if found is not None:
+            return found
+    return None
+
+
+class InstrumentationTest(CalculatorTestCase):
+    def test_widget_commands_are_timed(self):
+        self.app.perf.enable()
+        self.app.current_value_set("1+2")
+        find_widget(self.root, ttk.Button, "=").invoke()
+        find_widget(self.root, ttk.Radiobutton, "16进制").invoke()
+        stages = self.app.perf.snapshot()["stages"]
+        self.assertEqual(stages["calculate"]["count"], 1)
+        self.assertGreaterEqual(stages["update_displays"]["count"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import contextlib
+import io
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bitwise_engine import Engine, byteswap, byteswap_many, iter_chunks, main, selection_mask
+
+# (输入, 64位下的期望结果)，None表示无效输入
+CASES = [
+    ("5", 5),
+    ("0x10", 16),
+    ("-5", None),
+    ("-0x10", None),
+    ("0-5", (1 << 64) - 5),
+    ("2*-3", None),
+    ("3 + 4", 7),
+    # 不含运算符又无法作为数值解析的输入，界面显示为0（无效），不作为表达式计算
+    ("1e3", None),
+    ("0d10", None),
+    ("12 34", None),
+]
+
+
+class UnaryMinusTest(unittest.TestCase):
+    def test_leading_minus_is_rejected_like_the_calculator(self):
+        engine = Engine(64)
+        for text, expected in CASES:
+            with self.subTest(text=text):
+                self.assertEqual(engine.evaluate(text), expected)
+
+
+class InvalidLiteralTest(unittest.TestCase):
+    def test_not_evaluated_as_expression(self):
+        engine = Engine(64, scientific_mode=True)
+        for text in ["1e3", "0d10", "12 34"]:
+            with self.subTest(text=text):
+                self.assertIsNone(engine.value(text))
+        self.assertIsNone(Engine(64, template="x + 1").evaluate("1e3"))
+
+
+class SelectionMaskTest(unittest.TestCase):
+    def test_matches_bitwise_or(self):
+        for bits in [set(), {0}, {7, 8}, {0, 9, 100}, set(range(3, 4000, 7))]:
+            with self.subTest(bits=len(bits)):
+                self.assertEqual(selection_mask(bits), sum(1 << bit for bit in bits))
+
+
+def reference_swap(value, bit_size, word_bits):
+    """逐字翻转字节序的参考实现"""
+    unit = word_bits // 8
+    nbytes = ((bit_size + 7) // 8 + unit - 1) // unit * unit
+    data = value.to_bytes(nbytes, 'big')
+    return int.from_bytes(b''.join(data[i:i + unit][::-1] for i in range(0, nbytes, unit)), 'big')
+
+
+class ByteswapTest(unittest.TestCase):
+    def test_word_sizes_without_array_type(self):
+        value = int.from_bytes(bytes(range(1, 17)), 'big')
+        for word_bits in (24, 48):
+            with self.subTest(word_bits=word_bits):
+                expected = reference_swap(value, 128, word_bits)
+                self.assertEqual(byteswap(value, 128, word_bits), expected)
+                self.assertEqual(byteswap_many([value, 0, value], 128, word_bits), [expected, 0, expected])
+        self.assertEqual(byteswap(0x112233445566, 48, 24), 0x332211665544)
+
+
+class ParallelArgumentTest(unittest.TestCase):
+    def test_rejects_non_positive_chunk_size_and_jobs(self):
+        for argv in (["--chunk-size", "0", "-j", "2"], ["--chunk-size", "-5", "-j", "2"],
+                     ["-j", "0"], ["-j", "x"]):
+            with self.subTest(argv=argv), contextlib.redirect_stderr(io.StringIO()):
+                with self.assertRaises(SystemExit) as cm:
+                    main(argv)
+                self.assertEqual(cm.exception.code, 2)
+
+    def test_iter_chunks(self):
+        self.assertEqual(list(iter_chunks(range(5), 2)), [[0, 1], [2, 3], [4]])
+        with self.assertRaises(ValueError):
+            list(iter_chunks(range(5), 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bitwise_engine import Engine
+from bitwise_expr import ExpressionCache, compile_template, evaluate
+from bitwise_workspace import Workspace
+
+
+class TrailingTokenTest(unittest.TestCase):
+    def test_comma_outside_call_is_invalid(self):
+        for text in ["1,000", "1,000+5", "(1,2)", "popcount(1),2"]:
+            with self.subTest(text=text):
+                self.assertIsNone(evaluate(text))
+                self.assertIsNone(ExpressionCache().evaluate(text))
+                self.assertIsNone(Engine(64).evaluate(text))
+                with self.assertRaises(ValueError):
+                    compile_template(text)
+
+    def test_leftover_tokens_are_invalid(self):
+        self.assertIsNone(evaluate("1 2"))
+        self.assertIsNone(evaluate("(1+2))"))
+
+    def test_comma_separates_call_arguments(self):
+        self.assertEqual(evaluate("rotl(1, 1)"), 2)
+        self.assertEqual(evaluate("popcount(0x1FF, 8)"), 8)
+
+
+class NegativeConstantTest(unittest.TestCase):
+    def test_negative_folded_base_raised_to_power(self):
+        template = compile_template("(0-2)^x", scientific_mode=True)
+        self.assertEqual(template(2), 4)
+        self.assertEqual(template(3), -8)
+        self.assertEqual(template(2), evaluate("(0-2)^2", True))
+
+    def test_workspace_register(self):
+        workspace = Workspace(64, scientific_mode=True)
+        workspace.assign("x", "2")
+        workspace.assign("y", "(0-2)^x")
+        self.assertEqual(workspace.value("y"), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
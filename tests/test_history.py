@@ -0,0 +1,64 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bitwise_history import HistoryStore
+
+
+class HistoryStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "history.txt")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_reusing_newest_entry_raises_its_score(self):
+        store = HistoryStore(self.path)
+        store.add("0x1")
+        score = store.entries["0x1"]
+        self.assertTrue(store.add("0x1"))
+        self.assertGreater(store.entries["0x1"], score)
+
+    def test_repeated_use_updates_cached_ranking(self):
+        # scan_limit=0 使所有前缀查询都使用增量维护的排序缓存
+        cached = HistoryStore(self.path, scan_limit=0, top_size=10)
+        for value in ["0x1", "0x2", "0x3"]:
+            cached.add(value)
+        self.assertEqual(cached.search("0x", 10), ["0x3", "0x2", "0x1"])
+        cached.add("0x1")
+        for _ in range(3):
+            cached.add("0x1")
+        cached.add("0x2")
+        cached.add("0x3")
+        # 多次使用的0x1排在只多用了一次的0x2之前
+        expected = sorted(cached.entries, key=cached.entries.__getitem__, reverse=True)
+        self.assertEqual(cached.search("0x", 10), expected)
+        self.assertLess(expected.index("0x1"), expected.index("0x2"))
+
+    def test_repeated_newest_entry_is_not_journaled(self):
+        store = HistoryStore(self.path)
+        for value in ["0x1", "0x2", "0x2", "0x2", "0x1"]:
+            store.add(value)
+        with open(self.path, encoding="utf-8") as f:
+            self.assertEqual(f.read().split(), ["0x1", "0x2", "0x1"])
+
+    def test_locale_encoded_file_is_loaded_and_converted(self):
+        with open(self.path, "w", encoding="gbk") as f:
+            f.write("0x1\n位掩码 = 0xFF\n")
+        store = HistoryStore(self.path)
+        with mock.patch("locale.getpreferredencoding", return_value="gbk"):
+            store.load()
+        self.assertEqual(store.newest_first(), ["位掩码 = 0xFF", "0x1"])
+        # 重写为UTF-8后追加的记录与旧内容使用相同的编码
+        store.add("0x2")
+        with open(self.path, encoding="utf-8") as f:
+            self.assertEqual(f.read().splitlines(), ["0x1", "位掩码 = 0xFF", "0x2"])
+
+
+if __name__ == "__main__":
+    unittest.main()
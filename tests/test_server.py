@@ -0,0 +1,40 @@
+import json
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bitwise_server import MAX_BITS, EvaluationServer
+
+
+class HandleJsonTest(unittest.TestCase):
+    def request(self, server, **fields):
+        return json.loads(server.handle_line(json.dumps(fields)))
+
+    def test_rejects_bits_above_limit(self):
+        server = EvaluationServer()
+        response = self.request(server, expr="1", bits=1000000000)
+        self.assertFalse(response["ok"])
+        self.assertIn(str(MAX_BITS), response["error"])
+        self.assertEqual(len(server.engines), 0)
+
+        response = self.request(server, expr="2 * 4", bits=MAX_BITS)
+        self.assertTrue(response["ok"])
+        self.assertEqual(response["value"], "8")
+
+    def test_configurable_limit(self):
+        server = EvaluationServer(max_bits=128)
+        self.assertFalse(self.request(server, expr="1", bits=256)["ok"])
+        self.assertTrue(self.request(server, expr="1", bits=128)["ok"])
+
+    def test_engines_are_bounded(self):
+        server = EvaluationServer(max_engines=4)
+        for bits in range(1, 20):
+            self.assertTrue(self.request(server, expr="1", bits=bits)["ok"])
+        self.assertEqual(len(server.engines), 4)
+        self.assertEqual(list(server.engines), [(bits, 10, False) for bits in range(16, 20)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,28 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bitwise_workspace import Workspace
+
+
+class PreviewTest(unittest.TestCase):
+    def test_self_reference_previews_stored_value_after_commit(self):
+        workspace = Workspace(64)
+        workspace.assign("r0", "5")
+        self.assertEqual(workspace.preview("r0", "r0 + 1"), 6)
+        workspace.assign("r0", "r0 + 1")
+        self.assertEqual(workspace.value("r0"), 6)
+        # 保存后再次预览同一条语句不会在新值上再加1
+        self.assertEqual(workspace.preview("r0", "r0 + 1"), workspace.value("r0"))
+
+    def test_preview_does_not_modify_registers(self):
+        workspace = Workspace(64)
+        workspace.assign("a", "1")
+        self.assertEqual(workspace.preview("a", "a + 1"), 2)
+        self.assertEqual(workspace.value("a"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()